@@ -1,17 +1,27 @@
+from collections import Counter
+
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.core.exceptions import ValidationError
 from django.shortcuts import redirect
 from django.templatetags.static import static
+from django.utils import timezone
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.http import url_has_allowed_host_and_scheme
-from django.db.models import Prefetch
+from django.db.models import Q
 
+from geodata.places import enqueue_geocoding
 from .models import Product
 from .models import ProductCategory
 from .models import Restaurant
+from .models import RestaurantLoad
 from .models import RestaurantMenuItem
 from .models import Order
 from .models import OrderItem
+from .models import Customer
+from .models import CustomerAddress
 
 
 class RestaurantMenuItemInline(admin.TabularInline):
@@ -111,6 +121,20 @@ class ProductAdmin(admin.ModelAdmin):
     pass
 
 
+class CustomerAddressInline(admin.TabularInline):
+    model = CustomerAddress
+    fields = ['address', 'place', 'last_used_at']
+    readonly_fields = ['place', 'last_used_at']
+    extra = 0
+
+
+@admin.register(Customer)
+class CustomerAdmin(admin.ModelAdmin):
+    search_fields = ['phonenumber']
+    list_display = ['phonenumber', 'created_at']
+    inlines = [CustomerAddressInline]
+
+
 class OrderItemsInline(admin.TabularInline):
     model = OrderItem
     readonly_fields = ['product', 'get_image', 'quantity']
@@ -124,10 +148,38 @@ class OrderItemsInline(admin.TabularInline):
         )
 
 
+class OrderAdminForm(forms.ModelForm):
+    user = None
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not self.instance.pk:
+            return cleaned_data
+        # форма проверяется в той же транзакции, что и сохранение, поэтому
+        # блокировка не даст другому менеджеру взять заказ до конца записи
+        claimed_order = (
+            Order.objects
+            .filter(pk=self.instance.pk)
+            .claimed_by_others(self.user, settings.ORDER_CLAIM_TIMEOUT)
+            .select_related('claimed_by')
+            .select_for_update(of=('self',))
+            .first()
+        )
+        if claimed_order:
+            claimed_at = timezone.localtime(claimed_order.claimed_at)
+            raise ValidationError(
+                f'Заказ взял менеджер {claimed_order.claimed_by} '
+                f'в {claimed_at:%H:%M}. Пока заказ закреплён за ним, '
+                'сохранить изменения нельзя.'
+            )
+        return cleaned_data
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
+    form = OrderAdminForm
     inlines = [OrderItemsInline,]
-    list_display = ['firstname', 'phonenumber', 'address']
+    list_display = ['firstname', 'phonenumber', 'address', 'total_cost']
     fields = [
         'status',
         'firstname',
@@ -139,9 +191,12 @@ class OrderAdmin(admin.ModelAdmin):
         'payment_method',
         'created_at',
         'called_at',
-        'delivered_at'
+        'delivered_at',
+        'total_cost',
+        'claimed_by',
+        'claimed_at'
     ]
-    readonly_fields = ['created_at']
+    readonly_fields = ['created_at', 'total_cost', 'claimed_by', 'claimed_at']
 
     def response_change(self, request, obj):
         res = super().response_post_save_change(request, obj)
@@ -155,38 +210,52 @@ class OrderAdmin(admin.ModelAdmin):
             return res
 
     def save_model(self, request, obj, form, change):
+        if not change or 'address' in form.changed_data:
+            obj.place = enqueue_geocoding(obj.address)
         if obj.cooking_now:
             obj.status = 'COOK'
         elif not obj.cooking_now and obj.status != 'PROC':
             obj.status = 'UNPR'
-        return super().save_model(request, obj, form, change)
+        previous_restaurant_id = None
+        if change:
+            previous_restaurant_id = (
+                Order.objects
+                .select_for_update()
+                .filter(pk=obj.pk, status='COOK')
+                .values_list('cooking_now', flat=True)
+                .first()
+            )
+        current_restaurant_id = obj.cooking_now_id if obj.status == 'COOK' else None
+        result = super().save_model(request, obj, form, change)
+        if obj.status == 'PROC':
+            obj.candidates.all().delete()
+        elif obj.status == 'UNPR':
+            # заказ могли вернуть из обработанных, а кандидатов у него уже нет
+            Order.objects.filter(pk=obj.pk).refresh_candidate_restaurants()
+        if previous_restaurant_id != current_restaurant_id:
+            load_deltas = Counter()
+            if previous_restaurant_id:
+                load_deltas[previous_restaurant_id] -= 1
+            if current_restaurant_id:
+                load_deltas[current_restaurant_id] += 1
+            RestaurantLoad.objects.adjust(load_deltas)
+        return result
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        if any(formset.has_changed() for formset in formsets):
+            Order.objects.filter(pk=form.instance.pk).refresh_total_cost()
 
     def get_form(self, request, obj=None, change=False, **kwargs):
         form = super().get_form(request, obj, change, **kwargs)
+        form.user = request.user
         if obj:
-            products = obj.products.prefetch_related(
-                Prefetch(
-                    'menu_items',
-                    queryset=(
-                        RestaurantMenuItem.objects
-                        .filter(availability=True)
-                        .select_related('restaurant')
-                    ),
-                    to_attr='available_menu_items'
-                )
-            )
-            restaurants = None
-            for product in products:
-                available_menu_items = getattr(product, 'available_menu_items', [])
-                if restaurants is None:
-                    restaurants = {
-                        item.restaurant.id for item in available_menu_items}
-                else:
-                    restaurants.intersection_update(
-                        item.restaurant.id for item in available_menu_items)
             form.base_fields['cooking_now'].queryset = (
                 Restaurant
                 .objects
-                .filter(id__in=list(restaurants))
+                .filter(
+                    Q(order_candidates__order=obj) | Q(pk=obj.cooking_now_id)
+                )
+                .distinct()
             )
         return form
@@ -0,0 +1,48 @@
+from collections import Counter
+
+from django.conf import settings
+
+from .models import OrderCandidateRestaurant, RestaurantLoad
+
+
+def get_restaurant_loads():
+    loads = RestaurantLoad.objects.values_list(
+        'restaurant',
+        'cooking_orders_count'
+    )
+    return Counter(dict(loads))
+
+
+def get_candidate_distances(orders):
+    orders_by_id = {order.id: order for order in orders}
+    nearest_restaurants = (
+        OrderCandidateRestaurant.objects
+        .filter(order__in=orders)
+        .nearest(
+            settings.RESTAURANT_SEARCH_RADIUS,
+            settings.RESTAURANT_SEARCH_LIMIT
+        )
+    )
+    return {
+        (orders_by_id[order_id], restaurant): distance
+        for order_id, restaurants in nearest_restaurants.items()
+        for restaurant, distance in restaurants
+    }
+
+
+def plan_assignments(orders, capacity, restaurant_loads=None):
+    if restaurant_loads is None:
+        restaurant_loads = get_restaurant_loads()
+    loads = Counter(restaurant_loads)
+    candidate_distances = get_candidate_distances(orders)
+
+    assignments = {}
+    for (order, restaurant), distance in sorted(
+        candidate_distances.items(),
+        key=lambda item: (item[1], item[0][0].created_at, item[0][0].id)
+    ):
+        if order in assignments or loads[restaurant.id] >= capacity:
+            continue
+        assignments[order] = (restaurant, distance)
+        loads[restaurant.id] += 1
+    return assignments
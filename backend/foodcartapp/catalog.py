@@ -0,0 +1,86 @@
+import gzip
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from .models import Product, ProductCatalogVersion
+
+
+PRODUCT_CATALOG_CACHE_KEY = 'foodcartapp:product_catalog'
+
+
+def serialize_products(products):
+    dumped_products = []
+    for product in products:
+        dumped_product = {
+            'id': product.id,
+            'name': product.name,
+            'price': product.price,
+            'special_status': product.special_status,
+            'description': product.description,
+            'category': {
+                'id': product.category.id,
+                'name': product.category.name,
+            } if product.category else None,
+            'image': product.image.url,
+            'restaurant': {
+                'id': product.id,
+                'name': product.name,
+            }
+        }
+        dumped_products.append(dumped_product)
+    return dumped_products
+
+
+def build_product_catalog():
+    products = Product.objects.select_related('category').available()
+    content = json.dumps(
+        serialize_products(products),
+        cls=DjangoJSONEncoder,
+        ensure_ascii=False,
+        separators=(',', ':'),
+    ).encode()
+    etag = hashlib.sha1(content).hexdigest()
+    return {
+        'content': content,
+        # без mtime=0 в заголовок попадает время сборки, и у процессов
+        # получались бы разные байты под одним и тем же ETag
+        'gzip_content': gzip.compress(content, mtime=0),
+        'etag': f'"{etag}"',
+        'gzip_etag': f'"{etag}-gzip"',
+    }
+
+
+def get_catalog_version():
+    return (
+        ProductCatalogVersion.objects
+        .values_list('version', flat=True)
+        .first()
+    ) or 0
+
+
+def get_product_catalog():
+    # версия хранится в базе, поэтому правка меню видна всем процессам,
+    # даже если у каждого свой кэш в памяти
+    cache_key = f'{PRODUCT_CATALOG_CACHE_KEY}:{get_catalog_version()}'
+    catalog = cache.get(cache_key)
+    if catalog is None:
+        catalog = build_product_catalog()
+        cache.set(
+            cache_key,
+            catalog,
+            settings.PRODUCT_CATALOG_CACHE_TIMEOUT
+        )
+    return catalog
+
+
+def invalidate_product_catalog():
+    updated_count = ProductCatalogVersion.objects.update(
+        version=F('version') + 1
+    )
+    if not updated_count:
+        ProductCatalogVersion.objects.get_or_create(defaults={'version': 1})
@@ -0,0 +1,131 @@
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from foodcartapp.assignment import get_restaurant_loads, plan_assignments
+from foodcartapp.models import Order, RestaurantLoad
+
+
+class Command(BaseCommand):
+    help = 'Назначает необработанные заказы ближайшим ресторанам с учётом загрузки'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--capacity',
+            type=int,
+            default=settings.ORDER_ASSIGNMENT_CAPACITY,
+            help='Сколько заказов ресторан может готовить одновременно'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько заказов распределять за одну транзакцию'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать назначения, ничего не сохраняя'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, распределяя новые заказы'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=30,
+            help='Пауза в секундах между проходами'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.assign_orders(
+                options['capacity'],
+                options['batch_size'],
+                options['dry_run']
+            )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def assign_orders(self, capacity, batch_size, dry_run):
+        # при --dry-run назначения не сохраняются, поэтому загрузку
+        # ресторанов между партиями считаем сами
+        restaurant_loads = get_restaurant_loads() if dry_run else None
+        orders_count = 0
+        assigned_count = 0
+        cursor = None
+        while True:
+            orders, assignments = self.assign_batch(
+                capacity,
+                batch_size,
+                dry_run,
+                cursor,
+                restaurant_loads
+            )
+            orders_count += len(orders)
+            assigned_count += len(assignments)
+            if dry_run:
+                restaurant_loads.update(
+                    restaurant.id for restaurant, _ in assignments.values()
+                )
+            if len(orders) < batch_size:
+                break
+            cursor = (orders[-1].created_at, orders[-1].id)
+        self.stdout.write(
+            f'Назначено заказов: {assigned_count} из {orders_count}'
+        )
+
+    def assign_batch(self, capacity, batch_size, dry_run, cursor,
+                     restaurant_loads):
+        with transaction.atomic():
+            orders = (
+                Order.objects
+                .assignable()
+                .unclaimed(settings.ORDER_CLAIM_TIMEOUT)
+            )
+            if cursor:
+                created_at, order_id = cursor
+                orders = orders.filter(
+                    Q(created_at__gt=created_at)
+                    | Q(created_at=created_at, id__gt=order_id)
+                )
+            orders = list(
+                orders
+                .select_related('place')
+                .select_for_update(skip_locked=True, of=('self',))
+                .order_by('created_at', 'id')[:batch_size]
+            )
+            assignments = plan_assignments(orders, capacity, restaurant_loads)
+
+            for order, (restaurant, distance) in assignments.items():
+                self.stdout.write(
+                    f'{order.id} {order.address}: '
+                    f'{restaurant.name}, {distance / 1000:.1f} км'
+                )
+            for order in orders:
+                if order not in assignments:
+                    self.stdout.write(f'{order.id} {order.address}: не назначен')
+            if dry_run:
+                return orders, assignments
+
+            updated_at = timezone.now()
+            for order, (restaurant, _) in assignments.items():
+                order.cooking_now = restaurant
+                order.status = 'COOK'
+                order.updated_at = updated_at
+            Order.objects.bulk_update(
+                assignments.keys(),
+                ['cooking_now', 'status', 'updated_at']
+            )
+            RestaurantLoad.objects.adjust(Counter(
+                restaurant.id for restaurant, _ in assignments.values()
+            ))
+        return orders, assignments
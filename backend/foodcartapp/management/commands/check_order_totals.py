@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+
+from foodcartapp.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Сверяет сохранённую стоимость заказов с суммой их позиций'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Пересчитать стоимость заказов, где она разошлась'
+        )
+
+    def handle(self, *args, **options):
+        mismatches = list(
+            Order.objects
+            .with_items_cost()
+            .exclude(total_cost=F('items_cost'))
+            .values_list('pk', 'total_cost', 'items_cost')
+        )
+        for order_id, total_cost, items_cost in mismatches:
+            self.stdout.write(f'Заказ {order_id}: {total_cost} != {items_cost}')
+        if mismatches and options['fix']:
+            Order.objects.filter(
+                pk__in=[order_id for order_id, _, _ in mismatches]
+            ).refresh_total_cost()
+            self.stdout.write(f'Исправлено заказов: {len(mismatches)}')
+        elif mismatches:
+            raise CommandError(f'Расхождений: {len(mismatches)}')
+        else:
+            self.stdout.write('Расхождений нет')
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Order
+from geodata.models import PlaceDistance
+
+
+class Command(BaseCommand):
+    help = 'Удаляет сохранённые расстояния от адресов, по которым нет открытых заказов'
+
+    def handle(self, *args, **options):
+        open_order_places = (
+            Order.objects
+            .filter(status__in=['UNPR', 'COOK'], place__isnull=False)
+            .values('place')
+        )
+        deleted_count, _ = (
+            PlaceDistance.objects
+            .exclude(from_place__in=open_order_places)
+            .delete()
+        )
+        self.stdout.write(f'Удалено расстояний: {deleted_count}')
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённую стоимость заказов по их позициям'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько заказов пересчитывать одним запросом'
+        )
+
+    def handle(self, *args, **options):
+        order_ids = Order.objects.order_by('pk').values_list('pk', flat=True)
+        updated_count = 0
+        last_id = 0
+        while True:
+            batch_ids = list(
+                order_ids.filter(pk__gt=last_id)[:options['batch_size']]
+            )
+            if not batch_ids:
+                break
+            updated_count += (
+                Order.objects
+                .filter(pk__in=batch_ids)
+                .refresh_total_cost()
+            )
+            last_id = batch_ids[-1]
+        self.stdout.write(f'Пересчитано заказов: {updated_count}')
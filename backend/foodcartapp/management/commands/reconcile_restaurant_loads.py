@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import RestaurantLoad
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики готовящихся заказов у ресторанов'
+
+    def handle(self, *args, **options):
+        mismatches = RestaurantLoad.objects.reconcile()
+        for restaurant, stored_count, actual_count in mismatches:
+            self.stdout.write(f'{restaurant}: {stored_count} -> {actual_count}')
+        self.stdout.write(f'Исправлено счётчиков: {len(mismatches)}')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рестораны, способные выполнить необработанные заказы'
+
+    def handle(self, *args, **options):
+        orders = Order.objects.filter(status='UNPR')
+        orders.refresh_candidate_restaurants()
+        self.stdout.write(f'Обновлено заказов: {orders.count()}')
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0049_alter_orderitem_quantity'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'created_at'], name='foodcartapp_status_00a082_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+
+def enqueue_restaurant_addresses(apps, schema_editor):
+    Restaurant = apps.get_model('foodcartapp', 'Restaurant')
+    Place = apps.get_model('geodata', 'Place')
+    GeocodeJob = apps.get_model('geodata', 'GeocodeJob')
+
+    known_addresses = set(Place.objects.values_list('address', flat=True))
+    addresses = {
+        address
+        for address in Restaurant.objects.values_list('address', flat=True)
+        if address and address not in known_addresses
+    }
+    GeocodeJob.objects.bulk_create(
+        [GeocodeJob(address=address) for address in addresses],
+        ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0050_order_status_created_at_index'),
+        ('geodata', '0003_geocodejob'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            enqueue_restaurant_addresses,
+            migrations.RunPython.noop
+        )
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, F, OuterRef, Subquery
+
+
+def fill_order_candidates(apps, schema_editor):
+    Restaurant = apps.get_model('foodcartapp', 'Restaurant')
+    OrderItem = apps.get_model('foodcartapp', 'OrderItem')
+    OrderCandidateRestaurant = apps.get_model(
+        'foodcartapp',
+        'OrderCandidateRestaurant'
+    )
+
+    order_products_count = (
+        OrderItem.objects
+        .filter(order=OuterRef('order_id'))
+        .values('order')
+        .annotate(products_count=Count('product', distinct=True))
+        .values('products_count')
+    )
+    candidates = (
+        Restaurant.objects
+        .filter(
+            menu_items__availability=True,
+            menu_items__product__orderitem__order__status='UNPR',
+        )
+        .annotate(
+            order_id=F('menu_items__product__orderitem__order'),
+            matched_products_count=Count('menu_items__product', distinct=True),
+        )
+        .filter(matched_products_count=Subquery(order_products_count))
+        .values_list('order_id', 'pk')
+    )
+    batch = []
+    for order_id, restaurant_id in candidates.iterator():
+        batch.append(OrderCandidateRestaurant(
+            order_id=order_id,
+            restaurant_id=restaurant_id
+        ))
+        if len(batch) == 1000:
+            OrderCandidateRestaurant.objects.bulk_create(batch)
+            batch = []
+    OrderCandidateRestaurant.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0051_enqueue_restaurant_geocoding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderCandidateRestaurant',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='candidates', to='foodcartapp.order', verbose_name='Заказ')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_candidates', to='foodcartapp.restaurant', verbose_name='Ресторан')),
+            ],
+            options={
+                'verbose_name': 'ресторан, способный выполнить заказ',
+                'verbose_name_plural': 'рестораны, способные выполнить заказ',
+                'unique_together': {('order', 'restaurant')},
+            },
+        ),
+        migrations.RunPython(
+            fill_order_candidates,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+import phonenumber_field.modelfields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geodata', '0006_place_normalized_address'),
+        ('foodcartapp', '0052_ordercandidaterestaurant'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Customer',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phonenumber', phonenumber_field.modelfields.PhoneNumberField(max_length=128, region=None, unique=True, verbose_name='Номер')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Первый заказ')),
+            ],
+            options={
+                'verbose_name': 'покупатель',
+                'verbose_name_plural': 'покупатели',
+            },
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='customer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='foodcartapp.customer', verbose_name='Покупатель'),
+        ),
+        migrations.CreateModel(
+            name='CustomerAddress',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=150, verbose_name='Адрес')),
+                ('normalized_address', models.CharField(max_length=150, verbose_name='Нормализованный адрес')),
+                ('last_used_at', models.DateTimeField(auto_now=True, verbose_name='Последний заказ')),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='addresses', to='foodcartapp.customer', verbose_name='Покупатель')),
+                ('place', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='customer_addresses', to='geodata.place', verbose_name='Место')),
+            ],
+            options={
+                'verbose_name': 'адрес покупателя',
+                'verbose_name_plural': 'адреса покупателей',
+                'unique_together': {('customer', 'normalized_address')},
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0053_customer_address_book'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='delivery_zone',
+            field=models.JSONField(blank=True, help_text='Вершины многоугольника: [[широта, долгота], ...]. Если не задана, ресторан доставляет по всему городу.', null=True, verbose_name='зона доставки'),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='zone_max_latitude',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='zone_max_longitude',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='zone_min_latitude',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='zone_min_longitude',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(fields=['zone_min_latitude', 'zone_max_latitude'], name='foodcartapp_zone_mi_6aa744_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(fields=['zone_min_longitude', 'zone_max_longitude'], name='foodcartapp_zone_mi_86372e_idx'),
+        ),
+    ]
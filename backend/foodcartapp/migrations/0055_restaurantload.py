@@ -0,0 +1,48 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def count_restaurant_loads(apps, schema_editor):
+    Restaurant = apps.get_model('foodcartapp', 'Restaurant')
+    RestaurantLoad = apps.get_model('foodcartapp', 'RestaurantLoad')
+
+    restaurants = Restaurant.objects.annotate(
+        cooking_orders_count=models.Count(
+            'order',
+            filter=models.Q(order__status='COOK')
+        )
+    )
+    RestaurantLoad.objects.bulk_create([
+        RestaurantLoad(
+            restaurant=restaurant,
+            cooking_orders_count=restaurant.cooking_orders_count
+        )
+        for restaurant in restaurants
+    ])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0054_restaurant_delivery_zone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RestaurantLoad',
+            fields=[
+                ('restaurant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='load', serialize=False, to='foodcartapp.restaurant', verbose_name='Ресторан')),
+                ('cooking_orders_count', models.IntegerField(default=0, verbose_name='Готовит заказов')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'загрузка ресторана',
+                'verbose_name_plural': 'загрузка ресторанов',
+            },
+        ),
+        migrations.RunPython(
+            count_restaurant_loads,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('foodcartapp', '0055_restaurantload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Взят в работу'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_orders', to=settings.AUTH_USER_MODEL, verbose_name='Взял в работу'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:25
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_total_costs(apps, schema_editor):
+    Order = apps.get_model('foodcartapp', 'Order')
+    OrderItem = apps.get_model('foodcartapp', 'OrderItem')
+
+    items_cost = (
+        OrderItem.objects
+        .filter(order=OuterRef('pk'))
+        .values('order')
+        .annotate(cost=Sum(F('quantity') * F('price')))
+        .values('cost')
+    )
+    Order.objects.update(
+        total_cost=Coalesce(
+            Subquery(items_cost),
+            Value(0),
+            output_field=models.DecimalField(max_digits=10, decimal_places=2)
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0057_order_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='total_cost',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Стоимость заказа'),
+        ),
+        migrations.RunPython(fill_total_costs, migrations.RunPython.noop),
+    ]
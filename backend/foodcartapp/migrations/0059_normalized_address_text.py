@@ -0,0 +1,18 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0058_order_total_cost'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customeraddress',
+            name='normalized_address',
+            field=models.TextField(verbose_name='Нормализованный адрес'),
+        ),
+    ]
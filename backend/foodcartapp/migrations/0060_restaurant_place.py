@@ -0,0 +1,45 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from geodata.normalization import normalize_address
+
+
+def link_restaurant_places(apps, schema_editor):
+    Restaurant = apps.get_model('foodcartapp', 'Restaurant')
+    Place = apps.get_model('geodata', 'Place')
+
+    for restaurant in Restaurant.objects.exclude(address=''):
+        place = (
+            Place.objects
+            .filter(normalized_address=normalize_address(restaurant.address))
+            .order_by(
+                models.Case(
+                    models.When(status='OK', then=models.Value(0)),
+                    default=models.Value(1)
+                ),
+                '-updated_at'
+            )
+            .first()
+        )
+        if place:
+            restaurant.place = place
+            restaurant.save(update_fields=['place'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geodata', '0009_normalized_address_text'),
+        ('foodcartapp', '0059_normalized_address_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='place',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='restaurants', to='geodata.place', verbose_name='место'),
+        ),
+        migrations.RunPython(link_restaurant_places, migrations.RunPython.noop),
+    ]
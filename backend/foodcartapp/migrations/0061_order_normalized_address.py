@@ -0,0 +1,33 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:35
+
+from django.db import migrations, models
+
+from geodata.normalization import normalize_address
+
+
+def fill_normalized_addresses(apps, schema_editor):
+    Order = apps.get_model('foodcartapp', 'Order')
+    orders = []
+    for order in Order.objects.only('address').iterator():
+        order.normalized_address = normalize_address(order.address)
+        orders.append(order)
+        if len(orders) == 1000:
+            Order.objects.bulk_update(orders, ['normalized_address'])
+            orders = []
+    Order.objects.bulk_update(orders, ['normalized_address'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0060_restaurant_place'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='normalized_address',
+            field=models.TextField(blank=True, db_index=True, verbose_name='Нормализованный адрес'),
+        ),
+        migrations.RunPython(fill_normalized_addresses, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:47
+
+from django.db import migrations, models
+
+
+def create_catalog_version(apps, schema_editor):
+    ProductCatalogVersion = apps.get_model('foodcartapp', 'ProductCatalogVersion')
+    ProductCatalogVersion.objects.create()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0061_order_normalized_address'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductCatalogVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=0, verbose_name='Версия')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Изменён')),
+            ],
+            options={
+                'verbose_name': 'версия каталога товаров',
+                'verbose_name_plural': 'версии каталога товаров',
+            },
+        ),
+        migrations.RunPython(
+            create_catalog_version,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def link_order_places(apps, schema_editor):
+    Order = apps.get_model('foodcartapp', 'Order')
+    Place = apps.get_model('geodata', 'Place')
+
+    places = (
+        Place.objects
+        .filter(normalized_address=models.OuterRef('normalized_address'))
+        .order_by(
+            models.Case(
+                models.When(status='OK', then=models.Value(0)),
+                default=models.Value(1)
+            ),
+            '-updated_at'
+        )
+        .values('pk')[:1]
+    )
+    Order.objects.exclude(normalized_address='').update(
+        place=models.Subquery(places)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geodata', '0011_placedistance_coordinates'),
+        ('foodcartapp', '0062_productcatalogversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='place',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='geodata.place', verbose_name='Место'),
+        ),
+        migrations.RunPython(link_order_places, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='order',
+            name='normalized_address',
+        ),
+    ]
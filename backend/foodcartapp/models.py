@@ -1,8 +1,19 @@
-from django.db import models
-from django.db.models import Prefetch, F, Sum
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F, Q, Sum, Count, Exists, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Now
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from phonenumber_field.modelfields import PhoneNumberField
 
+from geodata.models import Place
+from geodata.places import get_place_distances
+from geodata.zones import get_bounding_box, points_in_polygon
+
 
 class Restaurant(models.Model):
     name = models.CharField(
@@ -19,14 +30,76 @@ class Restaurant(models.Model):
         max_length=50,
         blank=True,
     )
+    place = models.ForeignKey(
+        Place,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='restaurants',
+        verbose_name='место'
+    )
+    delivery_zone = models.JSONField(
+        'зона доставки',
+        null=True,
+        blank=True,
+        help_text='Вершины многоугольника: [[широта, долгота], ...]. '
+                  'Если не задана, ресторан доставляет по всему городу.'
+    )
+    zone_min_latitude = models.FloatField(null=True, editable=False)
+    zone_max_latitude = models.FloatField(null=True, editable=False)
+    zone_min_longitude = models.FloatField(null=True, editable=False)
+    zone_max_longitude = models.FloatField(null=True, editable=False)
 
     class Meta:
         verbose_name = 'ресторан'
         verbose_name_plural = 'рестораны'
+        indexes = [
+            models.Index(fields=['zone_min_latitude', 'zone_max_latitude']),
+            models.Index(fields=['zone_min_longitude', 'zone_max_longitude']),
+        ]
 
     def __str__(self):
         return self.name
 
+    def clean(self):
+        if not self.delivery_zone:
+            return
+        try:
+            is_valid = len(self.delivery_zone) >= 3 and all(
+                len(point) == 2
+                and -90 <= float(point[0]) <= 90
+                and -180 <= float(point[1]) <= 180
+                for point in self.delivery_zone
+            )
+        except (TypeError, ValueError):
+            is_valid = False
+        if not is_valid:
+            raise ValidationError({
+                'delivery_zone': 'Укажите не меньше трёх вершин '
+                                 'в виде [[широта, долгота], ...]'
+            })
+
+    def save(self, *args, **kwargs):
+        if self.delivery_zone:
+            (
+                self.zone_min_latitude,
+                self.zone_max_latitude,
+                self.zone_min_longitude,
+                self.zone_max_longitude,
+            ) = get_bounding_box(self.delivery_zone)
+        else:
+            self.delivery_zone = None
+            self.zone_min_latitude = self.zone_max_latitude = None
+            self.zone_min_longitude = self.zone_max_longitude = None
+        return super().save(*args, **kwargs)
+
+    def get_cooking_orders_count(self):
+        try:
+            return self.load.cooking_orders_count
+        except RestaurantLoad.DoesNotExist:
+            return 0
+
 
 class ProductQuerySet(models.QuerySet):
     def available(self):
@@ -125,24 +198,198 @@ class RestaurantMenuItem(models.Model):
         return f"{self.restaurant.name} - {self.product.name}"
 
 
+class ProductCatalogVersion(models.Model):
+    version = models.PositiveIntegerField(
+        'Версия',
+        default=0
+    )
+    updated_at = models.DateTimeField(
+        'Изменён',
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = 'версия каталога товаров'
+        verbose_name_plural = 'версии каталога товаров'
+
+    def __str__(self):
+        return f'Каталог товаров, версия {self.version}'
+
+
+class Customer(models.Model):
+    phonenumber = PhoneNumberField(
+        'Номер',
+        unique=True
+    )
+    created_at = models.DateTimeField(
+        'Первый заказ',
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = 'покупатель'
+        verbose_name_plural = 'покупатели'
+
+    def __str__(self):
+        return str(self.phonenumber)
+
+
+class CustomerAddress(models.Model):
+    customer = models.ForeignKey(
+        Customer,
+        on_delete=models.CASCADE,
+        related_name='addresses',
+        verbose_name='Покупатель'
+    )
+    address = models.CharField(
+        'Адрес',
+        max_length=150
+    )
+    normalized_address = models.TextField(
+        'Нормализованный адрес'
+    )
+    place = models.ForeignKey(
+        Place,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='customer_addresses',
+        verbose_name='Место'
+    )
+    last_used_at = models.DateTimeField(
+        'Последний заказ',
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = 'адрес покупателя'
+        verbose_name_plural = 'адреса покупателей'
+        unique_together = [
+            ['customer', 'normalized_address']
+        ]
+
+    def __str__(self):
+        return f'{self.customer}: {self.address}'
+
+
 class OrderQuerySet(models.QuerySet):
 
-    def calculate_total_price(self):
-        return (
-            self
-            .prefetch_related(
-                Prefetch(
-                    'items',
-                    queryset=OrderItem.objects.select_related('product')
+    def with_items_cost(self):
+        return self.annotate(
+            items_cost=Coalesce(
+                Sum(F('items__quantity') * F('items__price')),
+                Value(0),
+                output_field=models.DecimalField(
+                    max_digits=10,
+                    decimal_places=2
                 )
             )
-            .annotate(
-                total_cost=Sum(
-                    F('items__quantity') * F('items__price')
+        )
+
+    def refresh_total_cost(self):
+        items_cost = (
+            OrderItem.objects
+            .filter(order=OuterRef('pk'))
+            .values('order')
+            .annotate(cost=Sum(F('quantity') * F('price')))
+            .values('cost')
+        )
+        return self.update(
+            total_cost=Coalesce(
+                Subquery(items_cost),
+                Value(0),
+                output_field=models.DecimalField(
+                    max_digits=10,
+                    decimal_places=2
                 )
+            ),
+            updated_at=timezone.now()
+        )
+
+    def get_candidate_restaurants(self):
+        order_products_count = (
+            OrderItem.objects
+            .filter(order=OuterRef('order_id'))
+            .values('order')
+            .annotate(products_count=Count('product', distinct=True))
+            .values('products_count')
+        )
+        return (
+            Restaurant.objects
+            .filter(
+                menu_items__availability=True,
+                menu_items__product__orderitem__order__in=self.values('pk'),
+            )
+            .annotate(
+                order_id=F('menu_items__product__orderitem__order'),
+                matched_products_count=Count(
+                    'menu_items__product',
+                    distinct=True
+                ),
             )
+            .filter(matched_products_count=Subquery(order_products_count))
         )
 
+    def assignable(self):
+        return self.filter(
+            Exists(
+                OrderCandidateRestaurant.objects.filter(order=OuterRef('pk'))
+            ),
+            status='UNPR',
+            cooking_now__isnull=True,
+            place__status='OK',
+        )
+
+    def unclaimed(self, claim_timeout):
+        return self.filter(
+            Q(claimed_at__isnull=True)
+            | Q(claimed_at__lt=timezone.now() - timedelta(seconds=claim_timeout))
+        )
+
+    def claimed_by_others(self, user, claim_timeout):
+        return self.exclude(claimed_by=user).filter(
+            claimed_at__gte=timezone.now() - timedelta(seconds=claim_timeout)
+        )
+
+    def claim_next(self, user, claim_timeout):
+        with transaction.atomic():
+            order = (
+                self
+                .filter(status='UNPR', cooking_now__isnull=True)
+                .unclaimed(claim_timeout)
+                .select_for_update(skip_locked=True)
+                .order_by('created_at', 'id')
+                .first()
+            )
+            if order:
+                order.claimed_by = user
+                order.claimed_at = timezone.now()
+                order.save(
+                    update_fields=['claimed_by', 'claimed_at', 'updated_at']
+                )
+        return order
+
+    def refresh_candidate_restaurants(self):
+        order_ids = list(self.values_list('pk', flat=True))
+        with transaction.atomic():
+            OrderCandidateRestaurant.objects.filter(
+                order__in=order_ids
+            ).delete()
+            OrderCandidateRestaurant.objects.bulk_create([
+                OrderCandidateRestaurant(
+                    order_id=restaurant.order_id,
+                    restaurant=restaurant
+                )
+                for restaurant in (
+                    Order.objects
+                    .filter(pk__in=order_ids)
+                    .get_candidate_restaurants()
+                )
+            ])
+            Order.objects.filter(pk__in=order_ids).update(
+                updated_at=timezone.now()
+            )
+
 
 class Order(models.Model):
     firstname = models.CharField(
@@ -156,10 +403,27 @@ class Order(models.Model):
     phonenumber = PhoneNumberField(
         'Номер'
     )
+    customer = models.ForeignKey(
+        Customer,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='orders',
+        verbose_name='Покупатель'
+    )
     address = models.CharField(
         'Адрес',
         max_length=150
     )
+    place = models.ForeignKey(
+        Place,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='orders',
+        verbose_name='Место'
+    )
     products = models.ManyToManyField(
         Product,
         through='OrderItem',
@@ -189,6 +453,14 @@ class Order(models.Model):
         max_length=200,
         blank=True
     )
+    total_cost = models.DecimalField(
+        'Стоимость заказа',
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        validators=[MinValueValidator(0)]
+    )
     cooking_now = models.ForeignKey(
         Restaurant,
         verbose_name='Готовит сейчас',
@@ -210,12 +482,33 @@ class Order(models.Model):
         blank=True,
         null=True
     )
+    claimed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='claimed_orders',
+        verbose_name='Взял в работу'
+    )
+    claimed_at = models.DateTimeField(
+        'Взят в работу',
+        blank=True,
+        null=True
+    )
+    updated_at = models.DateTimeField(
+        'Изменён',
+        auto_now=True,
+        db_index=True
+    )
 
     objects = OrderQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Заказ'
         verbose_name_plural = 'Заказы'
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
 
     def __str__(self):
         return f'Заказ на имя {self.firstname}'
@@ -246,3 +539,181 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f'Часть заказа: {self.order}'
+
+
+class OrderCandidateRestaurantQuerySet(models.QuerySet):
+    def delivering(self):
+        # рамки зон проверяются в SQL по индексам, многоугольники — только
+        # для прошедших рамку пар, одним вызовом на ресторан
+        order_latitude = F('order__place__latitude')
+        order_longitude = F('order__place__longitude')
+        candidates = list(
+            self
+            .filter(order__place__status='OK')
+            .filter(
+                Q(restaurant__delivery_zone__isnull=True)
+                | Q(
+                    restaurant__zone_min_latitude__lte=order_latitude,
+                    restaurant__zone_max_latitude__gte=order_latitude,
+                    restaurant__zone_min_longitude__lte=order_longitude,
+                    restaurant__zone_max_longitude__gte=order_longitude,
+                )
+            )
+            .select_related(
+                'order__place',
+                'restaurant__place',
+                'restaurant__load'
+            )
+        )
+        zone_candidates = defaultdict(list)
+        for candidate in candidates:
+            if candidate.restaurant.delivery_zone:
+                zone_candidates[candidate.restaurant_id].append(candidate)
+        outside_candidates = set()
+        for restaurant_candidates in zone_candidates.values():
+            is_inside = points_in_polygon(
+                [
+                    (candidate.order.place.latitude,
+                     candidate.order.place.longitude)
+                    for candidate in restaurant_candidates
+                ],
+                restaurant_candidates[0].restaurant.delivery_zone
+            )
+            outside_candidates.update(
+                candidate
+                for candidate, inside in zip(restaurant_candidates, is_inside)
+                if not inside
+            )
+        return [
+            candidate for candidate in candidates
+            if candidate not in outside_candidates
+        ]
+
+    def nearest(self, radius, limit=None):
+        located_candidates = self.filter(order__place__status='OK')
+        order_points = set(
+            located_candidates
+            .values_list('order__place__latitude', 'order__place__longitude')
+        )
+        # расстояния считаем только до ресторанов из соседних с заказами
+        # ячеек геохеша, а не до всех ресторанов сети
+        candidates = (
+            located_candidates
+            .filter(
+                restaurant__place__in=Place.objects
+                .filter(status='OK')
+                .around(order_points, radius)
+            )
+            .delivering()
+        )
+        distances = get_place_distances(
+            (candidate.order.place, candidate.restaurant.place)
+            for candidate in candidates
+        )
+        nearest_restaurants = defaultdict(list)
+        for candidate in candidates:
+            distance = distances[
+                (candidate.order.place.id, candidate.restaurant.place.id)
+            ]
+            if distance <= radius:
+                nearest_restaurants[candidate.order_id].append(
+                    (candidate.restaurant, distance)
+                )
+        return {
+            order_id: sorted(restaurants, key=lambda item: item[1])[:limit]
+            for order_id, restaurants in nearest_restaurants.items()
+        }
+
+
+class OrderCandidateRestaurant(models.Model):
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='candidates',
+        verbose_name='Заказ'
+    )
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name='order_candidates',
+        verbose_name='Ресторан'
+    )
+
+    objects = OrderCandidateRestaurantQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'ресторан, способный выполнить заказ'
+        verbose_name_plural = 'рестораны, способные выполнить заказ'
+        unique_together = [
+            ['order', 'restaurant']
+        ]
+
+    def __str__(self):
+        return f'{self.restaurant} может выполнить {self.order}'
+
+
+class RestaurantLoadQuerySet(models.QuerySet):
+    def adjust(self, deltas):
+        for restaurant_id, delta in deltas.items():
+            if not delta:
+                continue
+            self.get_or_create(restaurant_id=restaurant_id)
+            self.filter(restaurant_id=restaurant_id).update(
+                cooking_orders_count=F('cooking_orders_count') + delta,
+                updated_at=Now()
+            )
+
+    def reconcile(self):
+        with transaction.atomic():
+            loads = {
+                load.restaurant_id: load
+                for load in self.select_for_update()
+            }
+            restaurants = Restaurant.objects.annotate(
+                cooking_orders_count=Count(
+                    'order',
+                    filter=Q(order__status='COOK')
+                )
+            )
+            mismatches = []
+            for restaurant in restaurants:
+                actual_count = restaurant.cooking_orders_count
+                load = loads.get(restaurant.pk)
+                if load and load.cooking_orders_count == actual_count:
+                    continue
+                if load is None:
+                    load = RestaurantLoad(restaurant=restaurant)
+                if load.cooking_orders_count != actual_count:
+                    mismatches.append(
+                        (restaurant, load.cooking_orders_count, actual_count)
+                    )
+                load.cooking_orders_count = actual_count
+                load.save()
+        return mismatches
+
+
+class RestaurantLoad(models.Model):
+    restaurant = models.OneToOneField(
+        Restaurant,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='load',
+        verbose_name='Ресторан'
+    )
+    cooking_orders_count = models.IntegerField(
+        'Готовит заказов',
+        default=0
+    )
+    updated_at = models.DateTimeField(
+        'Обновлено',
+        auto_now=True
+    )
+
+    objects = RestaurantLoadQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'загрузка ресторана'
+        verbose_name_plural = 'загрузка ресторанов'
+
+    def __str__(self):
+        return f'{self.restaurant}: {self.cooking_orders_count}'
@@ -1,16 +1,19 @@
+from datetime import timedelta
+
 from rest_framework import serializers
 from django.db import transaction
-from environs import Env
+from django.utils import timezone
+
+from .models import Customer, CustomerAddress, Order, OrderItem, Product
+from geodata.normalization import normalize_address
+from geodata.places import enqueue_geocoding
+
 
-from .models import Order, OrderItem, Product
-from geodata.models import Place
-from restaurateur.views import fetch_coordinates
+CUSTOMER_ADDRESS_TOUCH_INTERVAL = timedelta(days=1)
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
-    product = serializers.PrimaryKeyRelatedField(
-        queryset=Product.objects.all()
-    )
+    product = serializers.IntegerField()
     quantity = serializers.IntegerField()
 
     class Meta:
@@ -36,37 +39,95 @@ class OrderSerializer(serializers.ModelSerializer):
             'products'
         )
 
+    def validate_products(self, value):
+        product_ids = {item['product'] for item in value}
+        products = Product.objects.in_bulk(product_ids)
+        missing_ids = product_ids - products.keys()
+        if missing_ids:
+            raise serializers.ValidationError(
+                f'Недопустимый первичный ключ "{min(missing_ids)}" - '
+                'объект не существует.'
+            )
+        for item in value:
+            item['product'] = products[item['product']]
+        return value
+
+    def get_customer_address(self, phonenumber, address):
+        return (
+            CustomerAddress.objects
+            .filter(
+                customer__phonenumber=phonenumber,
+                normalized_address=normalize_address(address)
+            )
+            .select_related('customer', 'place')
+            .first()
+        )
+
+    def get_order_place(self, customer_address, address):
+        if customer_address and customer_address.place \
+                and customer_address.place.status == 'OK':
+            return customer_address.place
+        return enqueue_geocoding(address)
+
+    def save_customer_address(self, customer, customer_address, place,
+                              address):
+        if customer_address and customer_address.place == place:
+            stale_used_at = timezone.now() - CUSTOMER_ADDRESS_TOUCH_INTERVAL
+            if customer_address.last_used_at < stale_used_at:
+                customer_address.save(update_fields=['last_used_at'])
+            return
+        CustomerAddress.objects.update_or_create(
+            customer=customer,
+            normalized_address=normalize_address(address),
+            defaults={
+                'address': address,
+                'place': place,
+            }
+        )
+
     def create(self, validated_data):
-        try:
-            with transaction.atomic():
-                products = validated_data.pop('products')
-                order = Order.objects.create(**validated_data)
-                for item in products:
-                    product = item['product']
-                    OrderItem.objects.create(
-                        order=order,
-                        product=product,
-                        quantity=item['quantity'],
-                        price=product.price
-                    )
-            env = Env()
-            env.read_env()
-            api_key = env.str('YANDEX_API_KEY')
-            places = {place.address: place for place in Place.objects.all()}
-            if order.address not in places:
-                try:
-                    longitude, latitude = fetch_coordinates(
-                        api_key,
-                        order.address
-                    )
-                except Exception:
-                    longitude = 0.0
-                    latitude = 0.0
-                Place.objects.create(
-                    address=order.address,
-                    longitude=longitude,
-                    latitude=latitude
+        with transaction.atomic():
+            products = validated_data.pop('products')
+            customer_address = self.get_customer_address(
+                validated_data['phonenumber'],
+                validated_data['address']
+            )
+            if customer_address:
+                customer = customer_address.customer
+            else:
+                customer, _ = Customer.objects.get_or_create(
+                    phonenumber=validated_data['phonenumber']
+                )
+            # координаты адреса из адресной книги уже известны, геокодировать
+            # его не нужно, а доска и assign_orders читают место из заказа
+            place = self.get_order_place(
+                customer_address,
+                validated_data['address']
+            )
+            total_cost = sum(
+                item['product'].price * item['quantity']
+                for item in products
+            )
+            order = Order.objects.create(
+                customer=customer,
+                place=place,
+                total_cost=total_cost,
+                **validated_data
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    product=item['product'],
+                    quantity=item['quantity'],
+                    price=item['product'].price
                 )
-        except Exception as e:
-            print(f'error while creating order: {e}')
+                for item in products
+            ])
+            Order.objects.filter(pk=order.pk).refresh_candidate_restaurants()
+            self.save_customer_address(
+                customer,
+                customer_address,
+                place,
+                order.address
+            )
         return order
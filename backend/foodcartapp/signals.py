@@ -0,0 +1,43 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from geodata.places import enqueue_geocoding
+from .catalog import invalidate_product_catalog
+from .models import (
+    Order,
+    Product,
+    ProductCategory,
+    Restaurant,
+    RestaurantMenuItem,
+)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def reset_product_catalog(sender, **kwargs):
+    # новая версия станет видна другим процессам вместе с коммитом правки
+    invalidate_product_catalog()
+
+
+@receiver(post_save, sender=Restaurant)
+def geocode_restaurant_address(sender, instance, **kwargs):
+    place = enqueue_geocoding(instance.address, source='REST')
+    place_id = place.pk if place else None
+    if place_id != instance.place_id:
+        Restaurant.objects.filter(pk=instance.pk).update(place=place_id)
+        instance.place = place
+
+
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def refresh_affected_orders(sender, instance, **kwargs):
+    (
+        Order.objects
+        .filter(status='UNPR', items__product=instance.product_id)
+        .distinct()
+        .refresh_candidate_restaurants()
+    )
@@ -0,0 +1,771 @@
+import gzip
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.admin.sites import site
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.forms.models import model_to_dict
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from geodata.models import Place
+from geodata.normalization import normalize_address
+from geodata.places import get_place_distances, place_cache
+
+from .admin import OrderAdmin
+from .assignment import plan_assignments
+from .catalog import build_product_catalog
+from .models import (
+    Customer,
+    CustomerAddress,
+    Order,
+    OrderCandidateRestaurant,
+    OrderItem,
+    Product,
+    ProductCatalogVersion,
+    Restaurant,
+    RestaurantLoad,
+    RestaurantMenuItem,
+)
+
+
+class OrderAPITest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = [
+            Product.objects.create(name=f'Бургер {number}', price=100 + number)
+            for number in range(15)
+        ]
+        Place.objects.create(
+            address='Москва, Ленина 5',
+            latitude=55.75,
+            longitude=37.61,
+            status='OK'
+        )
+
+    def create_order(self, products_count):
+        response = self.client.post(
+            '/api/order/',
+            {
+                'firstname': 'Иван',
+                'lastname': 'Петров',
+                'phonenumber': '+79991234567',
+                'address': 'Москва, ул. Ленина, д. 5',
+                'products': [
+                    {'product': product.id, 'quantity': 2}
+                    for product in self.products[:products_count]
+                ],
+            },
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_one_line_cart(self):
+        self.create_order(1)
+        with self.assertNumQueries(12):
+            self.create_order(1)
+
+    def test_fifteen_line_cart(self):
+        self.create_order(1)
+        with self.assertNumQueries(12):
+            self.create_order(15)
+        order = Order.objects.latest('id')
+        self.assertEqual(order.items.count(), 15)
+        self.assertEqual(
+            order.total_cost,
+            sum(product.price * 2 for product in self.products)
+        )
+
+    def test_unknown_product(self):
+        response = self.client.post(
+            '/api/order/',
+            {
+                'firstname': 'Иван',
+                'lastname': 'Петров',
+                'phonenumber': '+79991234567',
+                'address': 'Москва, ул. Ленина, д. 5',
+                'products': [{'product': 0, 'quantity': 1}],
+            },
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+
+class OrderPlaceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.burger = Product.objects.create(name='Бургер', price=100)
+
+    def setUp(self):
+        place_cache.clear()
+
+    def create_order(self, address):
+        response = self.client.post(
+            '/api/order/',
+            {
+                'firstname': 'Иван',
+                'lastname': 'Петров',
+                'phonenumber': '+79991234567',
+                'address': address,
+                'products': [{'product': self.burger.id, 'quantity': 1}],
+            },
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return Order.objects.select_related('place').latest('id')
+
+    def test_new_address_is_queued_for_geocoding(self):
+        order = self.create_order('Москва, Ленина 5')
+        self.assertEqual(order.place.address, 'Москва, Ленина 5')
+        self.assertEqual(order.place.status, 'PEND')
+        self.assertEqual(
+            CustomerAddress.objects.get().place,
+            order.place
+        )
+
+    def test_order_gets_place_from_address_book(self):
+        place = Place.objects.create(
+            address='Москва, Ленина 5, подъезд 2',
+            latitude=55.75,
+            longitude=37.61,
+            status='OK'
+        )
+        CustomerAddress.objects.create(
+            customer=Customer.objects.create(phonenumber='+79991234567'),
+            address='Москва, ул. Ленина, д. 5',
+            normalized_address=normalize_address('Москва, ул. Ленина, д. 5'),
+            place=place
+        )
+        order = self.create_order('Москва, Ленина 5')
+        self.assertEqual(order.place, place)
+        self.assertFalse(Place.objects.filter(status='PEND').exists())
+
+
+class ProductCatalogTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(
+            name='Бургер',
+            price=100,
+            image='burger.jpg'
+        )
+        cls.menu_item = RestaurantMenuItem.objects.create(
+            restaurant=Restaurant.objects.create(name='Ресторан'),
+            product=cls.product
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_catalog(self, **headers):
+        return self.client.get('/api/products/', **headers)
+
+    def test_cached_catalog_costs_one_query(self):
+        self.get_catalog()
+        with self.assertNumQueries(1):
+            response = self.get_catalog()
+        self.assertEqual(
+            [product['name'] for product in json.loads(response.content)],
+            ['Бургер']
+        )
+
+    def test_not_modified(self):
+        etag = self.get_catalog()['ETag']
+        response = self.get_catalog(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_gzip(self):
+        plain_response = self.get_catalog()
+        response = self.get_catalog(HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(response.content),
+            plain_response.content
+        )
+        self.assertNotEqual(response['ETag'], plain_response['ETag'])
+
+        response = self.get_catalog(HTTP_ACCEPT_ENCODING='gzip;q=0, *')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_gzip_bytes_do_not_depend_on_build_time(self):
+        with mock.patch('gzip.time.time', return_value=1000):
+            first_catalog = build_product_catalog()
+        with mock.patch('gzip.time.time', return_value=2000):
+            second_catalog = build_product_catalog()
+        self.assertEqual(
+            first_catalog['gzip_content'],
+            second_catalog['gzip_content']
+        )
+
+    def test_menu_change_invalidates_catalog(self):
+        etag = self.get_catalog()['ETag']
+        self.menu_item.availability = False
+        self.menu_item.save()
+        response = self.get_catalog(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), [])
+
+    def test_change_saved_by_another_process(self):
+        self.get_catalog()
+        # другой процесс поменял цену и версию, а кэш этого процесса остался
+        Product.objects.update(price=150)
+        ProductCatalogVersion.objects.update(version=F('version') + 1)
+        response = self.get_catalog()
+        self.assertEqual(json.loads(response.content)[0]['price'], '150.00')
+
+
+def create_order(*products, **fields):
+    order = Order.objects.create(
+        firstname='Иван',
+        lastname='Петров',
+        phonenumber='+79991234567',
+        address='Москва, Ленина 5',
+        **fields
+    )
+    for product in products:
+        OrderItem.objects.create(
+            order=order,
+            product=product,
+            quantity=1,
+            price=product.price
+        )
+    return order
+
+
+class CandidateRestaurantsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.burger = Product.objects.create(name='Бургер', price=100)
+        cls.fries = Product.objects.create(name='Картошка', price=50)
+        cls.full_menu = Restaurant.objects.create(name='Полное меню')
+        cls.burgers_only = Restaurant.objects.create(name='Только бургеры')
+        cls.no_fries_today = Restaurant.objects.create(name='Нет картошки')
+        for restaurant in (cls.full_menu, cls.burgers_only, cls.no_fries_today):
+            RestaurantMenuItem.objects.create(
+                restaurant=restaurant,
+                product=cls.burger
+            )
+        RestaurantMenuItem.objects.create(
+            restaurant=cls.full_menu,
+            product=cls.fries
+        )
+        RestaurantMenuItem.objects.create(
+            restaurant=cls.no_fries_today,
+            product=cls.fries,
+            availability=False
+        )
+
+    def get_candidates(self, *orders):
+        return {
+            (restaurant.order_id, restaurant.name)
+            for restaurant in (
+                Order.objects
+                .filter(pk__in=[order.pk for order in orders])
+                .get_candidate_restaurants()
+            )
+        }
+
+    def test_restaurant_must_cook_every_product(self):
+        order = create_order(self.burger, self.fries)
+        self.assertEqual(
+            self.get_candidates(order),
+            {(order.id, 'Полное меню')}
+        )
+
+    def test_repeated_product_counts_once(self):
+        order = create_order(self.burger, self.burger)
+        self.assertEqual(len(self.get_candidates(order)), 3)
+
+    def test_orders_are_matched_separately(self):
+        burger_order = create_order(self.burger)
+        full_order = create_order(self.burger, self.fries)
+        self.assertEqual(
+            self.get_candidates(burger_order, full_order),
+            {
+                (burger_order.id, 'Полное меню'),
+                (burger_order.id, 'Только бургеры'),
+                (burger_order.id, 'Нет картошки'),
+                (full_order.id, 'Полное меню'),
+            }
+        )
+
+
+class CandidateTableTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.burger = Product.objects.create(name='Бургер', price=100)
+        cls.restaurant = Restaurant.objects.create(name='Ресторан')
+        cls.menu_item = RestaurantMenuItem.objects.create(
+            restaurant=cls.restaurant,
+            product=cls.burger
+        )
+
+    def get_candidate_ids(self, order):
+        return set(order.candidates.values_list('restaurant', flat=True))
+
+    def test_new_order_gets_candidates(self):
+        response = self.client.post(
+            '/api/order/',
+            {
+                'firstname': 'Иван',
+                'lastname': 'Петров',
+                'phonenumber': '+79991234567',
+                'address': 'Москва, Ленина 5',
+                'products': [{'product': self.burger.id, 'quantity': 1}],
+            },
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get()
+        self.assertEqual(self.get_candidate_ids(order), {self.restaurant.id})
+
+    def test_menu_item_flip_refreshes_open_orders(self):
+        order = create_order(self.burger)
+        Order.objects.filter(pk=order.pk).refresh_candidate_restaurants()
+        self.assertEqual(self.get_candidate_ids(order), {self.restaurant.id})
+
+        self.menu_item.availability = False
+        self.menu_item.save()
+        self.assertEqual(self.get_candidate_ids(order), set())
+
+        self.menu_item.availability = True
+        self.menu_item.save()
+        self.assertEqual(self.get_candidate_ids(order), {self.restaurant.id})
+
+    def test_menu_item_flip_leaves_processed_orders(self):
+        order = create_order(self.burger, status='PROC')
+        self.menu_item.availability = False
+        self.menu_item.save()
+        self.menu_item.availability = True
+        self.menu_item.save()
+        self.assertEqual(self.get_candidate_ids(order), set())
+
+    def test_admin_rebuilds_candidates_of_reopened_order(self):
+        order = create_order(self.burger)
+        Order.objects.filter(pk=order.pk).refresh_candidate_restaurants()
+        order_admin = OrderAdmin(Order, site)
+        request = RequestFactory().post('/')
+        request.user = User.objects.create_user('manager', is_staff=True)
+
+        form = mock.Mock(changed_data=['status'])
+        order.status = 'PROC'
+        order_admin.save_model(request, order, form, change=True)
+        self.assertEqual(self.get_candidate_ids(order), set())
+
+        order.status = 'UNPR'
+        order_admin.save_model(request, order, form, change=True)
+        self.assertEqual(self.get_candidate_ids(order), {self.restaurant.id})
+
+
+class DeliveryZoneTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.burger = Product.objects.create(name='Бургер', price=100)
+        zones = {
+            'Квадрат': [
+                [55.70, 37.50],
+                [55.80, 37.50],
+                [55.80, 37.70],
+                [55.70, 37.70],
+            ],
+            'Треугольник': [[55.70, 37.50], [55.80, 37.50], [55.70, 37.70]],
+            'Далеко': [[59.90, 30.30], [60.00, 30.30], [60.00, 30.40]],
+            'Весь город': None,
+        }
+        for name, zone in zones.items():
+            RestaurantMenuItem.objects.create(
+                restaurant=Restaurant.objects.create(
+                    name=name,
+                    delivery_zone=zone
+                ),
+                product=cls.burger
+            )
+        cls.place = Place.objects.create(
+            address='Москва, Ленина 5',
+            latitude=55.75,
+            longitude=37.65,
+            status='OK'
+        )
+
+    def get_delivering_restaurants(self, order):
+        Order.objects.filter(pk=order.pk).refresh_candidate_restaurants()
+        with self.assertNumQueries(1):
+            candidates = (
+                OrderCandidateRestaurant.objects
+                .filter(order=order)
+                .delivering()
+            )
+        return {candidate.restaurant.name for candidate in candidates}
+
+    def test_prunes_restaurants_outside_their_zones(self):
+        order = create_order(self.burger, place=self.place)
+        self.assertEqual(
+            self.get_delivering_restaurants(order),
+            {'Квадрат', 'Весь город'}
+        )
+
+    def test_skips_orders_without_coordinates(self):
+        order = create_order(self.burger)
+        self.assertEqual(self.get_delivering_restaurants(order), set())
+
+
+class NearestRestaurantsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.burger = Product.objects.create(name='Бургер', price=100)
+        coordinates = {
+            'Рядом': (55.7510, 37.6180),
+            'Через улицу': (55.7530, 37.6200),
+            'Подальше': (55.7600, 37.6300),
+            'Другой город': (59.9390, 30.3150),
+        }
+        place_cache.clear()
+        for name, (latitude, longitude) in coordinates.items():
+            Place.objects.create(
+                address=f'Адрес ресторана {name}',
+                latitude=latitude,
+                longitude=longitude,
+                status='OK'
+            )
+            RestaurantMenuItem.objects.create(
+                restaurant=Restaurant.objects.create(
+                    name=name,
+                    address=f'Адрес ресторана {name}'
+                ),
+                product=cls.burger
+            )
+        cls.order = create_order(
+            cls.burger,
+            place=Place.objects.create(
+                address='Москва, Ленина 5',
+                latitude=55.7500,
+                longitude=37.6170,
+                status='OK'
+            )
+        )
+        Order.objects.filter(pk=cls.order.pk).refresh_candidate_restaurants()
+
+    def get_nearest(self, radius, limit=None):
+        nearest_restaurants = (
+            OrderCandidateRestaurant.objects
+            .filter(order=self.order)
+            .nearest(radius, limit)
+        )
+        return [
+            restaurant.name
+            for restaurant, _ in nearest_restaurants.get(self.order.id, [])
+        ]
+
+    def test_sorted_by_distance_within_radius(self):
+        self.assertEqual(
+            self.get_nearest(2000),
+            ['Рядом', 'Через улицу', 'Подальше']
+        )
+        self.assertEqual(self.get_nearest(500), ['Рядом', 'Через улицу'])
+
+    def test_limit(self):
+        self.assertEqual(self.get_nearest(2000, limit=1), ['Рядом'])
+
+    def test_other_cities_are_not_measured(self):
+        with mock.patch(
+            'foodcartapp.models.get_place_distances',
+            wraps=get_place_distances
+        ) as measure:
+            self.get_nearest(2000)
+        measured_restaurants = {
+            to_place.address for _, to_place in measure.call_args.args[0]
+        }
+        self.assertNotIn('Адрес ресторана Другой город', measured_restaurants)
+
+
+class AssignOrdersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        place_cache.clear()
+        cls.burger = Product.objects.create(name='Бургер', price=100)
+        coordinates = {
+            'Рядом': (55.7510, 37.6180),
+            'Подальше': (55.7600, 37.6300),
+        }
+        cls.restaurants = {}
+        for name, (latitude, longitude) in coordinates.items():
+            Place.objects.create(
+                address=f'Адрес ресторана {name}',
+                latitude=latitude,
+                longitude=longitude,
+                status='OK'
+            )
+            cls.restaurants[name] = Restaurant.objects.create(
+                name=name,
+                address=f'Адрес ресторана {name}'
+            )
+            RestaurantMenuItem.objects.create(
+                restaurant=cls.restaurants[name],
+                product=cls.burger
+            )
+        cls.place = Place.objects.create(
+            address='Москва, Ленина 5',
+            latitude=55.7500,
+            longitude=37.6170,
+            status='OK'
+        )
+
+    def setUp(self):
+        self.orders = [
+            create_order(self.burger, place=self.place) for _ in range(3)
+        ]
+        Order.objects.refresh_candidate_restaurants()
+
+    def get_assigned_restaurants(self):
+        return [
+            order.cooking_now.name if order.cooking_now else None
+            for order in Order.objects.order_by('id')
+        ]
+
+    def test_plan_respects_capacity(self):
+        assignments = plan_assignments(
+            list(Order.objects.select_related('place').order_by('id')),
+            capacity=1,
+            restaurant_loads={}
+        )
+        self.assertEqual(
+            {
+                order.id: restaurant.name
+                for order, (restaurant, _) in assignments.items()
+            },
+            {self.orders[0].id: 'Рядом', self.orders[1].id: 'Подальше'}
+        )
+
+    def test_plan_counts_current_load(self):
+        assignments = plan_assignments(
+            list(Order.objects.select_related('place')),
+            capacity=2,
+            restaurant_loads={self.restaurants['Рядом'].id: 2}
+        )
+        self.assertEqual(
+            sorted(restaurant.name for restaurant, _ in assignments.values()),
+            ['Подальше', 'Подальше']
+        )
+
+    def test_assigns_every_batch(self):
+        call_command(
+            'assign_orders',
+            '--capacity=1',
+            '--batch-size=1',
+            stdout=StringIO()
+        )
+        self.assertEqual(
+            self.get_assigned_restaurants(),
+            ['Рядом', 'Подальше', None]
+        )
+        self.assertEqual(
+            set(Order.objects.values_list('status', flat=True)),
+            {'COOK', 'UNPR'}
+        )
+        self.assertEqual(
+            dict(RestaurantLoad.objects.values_list(
+                'restaurant__name',
+                'cooking_orders_count'
+            )),
+            {'Рядом': 1, 'Подальше': 1}
+        )
+
+    def test_dry_run_saves_nothing(self):
+        stdout = StringIO()
+        call_command(
+            'assign_orders',
+            '--capacity=1',
+            '--batch-size=1',
+            '--dry-run',
+            stdout=stdout
+        )
+        self.assertEqual(self.get_assigned_restaurants(), [None] * 3)
+        self.assertIn('Назначено заказов: 2 из 3', stdout.getvalue())
+
+
+class RestaurantLoadTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.first_restaurant = Restaurant.objects.create(name='Первый')
+        cls.second_restaurant = Restaurant.objects.create(name='Второй')
+        cls.manager = User.objects.create_user('manager', is_staff=True)
+
+    def get_loads(self):
+        return dict(RestaurantLoad.objects.values_list(
+            'restaurant__name',
+            'cooking_orders_count'
+        ))
+
+    def test_adjust(self):
+        RestaurantLoad.objects.adjust({self.first_restaurant.id: 2})
+        RestaurantLoad.objects.adjust({
+            self.first_restaurant.id: -1,
+            self.second_restaurant.id: 0,
+        })
+        self.assertEqual(self.get_loads(), {'Первый': 1})
+
+    def test_reconcile(self):
+        create_order(cooking_now=self.first_restaurant, status='COOK')
+        create_order(cooking_now=self.first_restaurant, status='PROC')
+        RestaurantLoad.objects.adjust({self.second_restaurant.id: 3})
+
+        mismatches = RestaurantLoad.objects.reconcile()
+
+        self.assertEqual(
+            {
+                (restaurant.name, stored_count, actual_count)
+                for restaurant, stored_count, actual_count in mismatches
+            },
+            {('Первый', 0, 1), ('Второй', 3, 0)}
+        )
+        self.assertEqual(self.get_loads(), {'Первый': 1, 'Второй': 0})
+        self.assertEqual(RestaurantLoad.objects.reconcile(), [])
+
+    def test_admin_moves_order_between_restaurants(self):
+        order = create_order()
+        order_admin = OrderAdmin(Order, site)
+        request = RequestFactory().post('/')
+        request.user = self.manager
+        form = mock.Mock(changed_data=['cooking_now'])
+
+        order.cooking_now = self.first_restaurant
+        order_admin.save_model(request, order, form, change=True)
+        self.assertEqual(self.get_loads(), {'Первый': 1})
+
+        order.cooking_now = self.second_restaurant
+        order_admin.save_model(request, order, form, change=True)
+        self.assertEqual(self.get_loads(), {'Первый': 0, 'Второй': 1})
+
+        order.cooking_now = None
+        order_admin.save_model(request, order, form, change=True)
+        self.assertEqual(order.status, 'UNPR')
+        self.assertEqual(self.get_loads(), {'Первый': 0, 'Второй': 0})
+
+
+@override_settings(ORDER_CLAIM_TIMEOUT=15 * 60)
+class OrderClaimTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', is_staff=True)
+        cls.other_manager = User.objects.create_user('other', is_staff=True)
+
+    def claim_next(self, user):
+        return Order.objects.claim_next(user, 15 * 60)
+
+    def test_claims_oldest_free_order(self):
+        stale_claim_at = timezone.now() - timedelta(hours=1)
+        create_order(status='PROC')
+        claimed_order = create_order(
+            claimed_by=self.other_manager,
+            claimed_at=timezone.now()
+        )
+        stale_order = create_order(
+            claimed_by=self.other_manager,
+            claimed_at=stale_claim_at
+        )
+        free_order = create_order()
+
+        self.assertEqual(self.claim_next(self.manager), stale_order)
+        self.assertEqual(self.claim_next(self.manager), free_order)
+        self.assertIsNone(self.claim_next(self.manager))
+
+        free_order.refresh_from_db()
+        self.assertEqual(free_order.claimed_by, self.manager)
+        claimed_order.refresh_from_db()
+        self.assertEqual(claimed_order.claimed_by, self.other_manager)
+
+    def test_claim_button_opens_the_order(self):
+        order = create_order()
+        self.client.force_login(self.manager)
+        response = self.client.post(reverse('restaurateur:claim_next_order'))
+        self.assertRedirects(
+            response,
+            reverse('admin:foodcartapp_order_change', args=[order.id])
+            + '?next=' + reverse('restaurateur:view_orders'),
+            fetch_redirect_response=False
+        )
+
+    def get_admin_form(self, order, user):
+        request = RequestFactory().post('/')
+        request.user = user
+        form_class = OrderAdmin(Order, site).get_form(request, order)
+        data = model_to_dict(order, fields=form_class.base_fields)
+        data['comment'] = 'Позвонить за час'
+        return form_class(data, instance=order)
+
+    def test_form_rejects_order_claimed_by_other_manager(self):
+        create_order()
+        order = self.claim_next(self.other_manager)
+        form = self.get_admin_form(order, self.manager)
+        self.assertFalse(form.is_valid())
+        self.assertIn('other', form.non_field_errors()[0])
+
+    def test_form_accepts_own_or_expired_claim(self):
+        create_order()
+        order = self.claim_next(self.manager)
+        self.assertTrue(self.get_admin_form(order, self.manager).is_valid())
+
+        Order.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+        order.refresh_from_db()
+        form = self.get_admin_form(order, self.other_manager)
+        self.assertTrue(form.is_valid(), form.errors)
+
+
+class OrderTotalsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.burger = Product.objects.create(name='Бургер', price=100)
+        cls.fries = Product.objects.create(name='Картошка', price=50)
+
+    def setUp(self):
+        self.order = create_order(self.burger, self.fries)
+        Order.objects.refresh_total_cost()
+        self.empty_order = create_order()
+
+    def check_order_totals(self, *args):
+        stdout = StringIO()
+        call_command('check_order_totals', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_refresh_total_cost(self):
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_cost, 150)
+        self.empty_order.refresh_from_db()
+        self.assertEqual(self.empty_order.total_cost, 0)
+
+    def test_no_mismatches(self):
+        self.assertIn('Расхождений нет', self.check_order_totals())
+
+    def test_reports_mismatches(self):
+        Order.objects.filter(pk=self.order.pk).update(total_cost=100)
+        with self.assertRaisesMessage(CommandError, 'Расхождений: 1'):
+            self.check_order_totals()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_cost, 100)
+
+    def test_fixes_mismatches(self):
+        Order.objects.filter(pk=self.order.pk).update(total_cost=100)
+        stdout = self.check_order_totals('--fix')
+        self.assertIn(f'Заказ {self.order.pk}: 100', stdout)
+        self.assertIn('Исправлено заказов: 1', stdout)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_cost, 150)
+
+    def test_recalculate_order_totals(self):
+        Order.objects.update(total_cost=1)
+        call_command('recalculate_order_totals', stdout=StringIO())
+        self.assertEqual(
+            list(Order.objects.order_by('id').values_list(
+                'total_cost',
+                flat=True
+            )),
+            [150, 0]
+        )
@@ -1,10 +1,12 @@
-from django.http import JsonResponse
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
 from django.templatetags.static import static
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
 
-from .models import Product
+from .catalog import get_product_catalog
 from .serializers import OrderSerializer
 
 
@@ -32,32 +34,48 @@ def banners_list_api(request):
     })
 
 
+def get_accepted_encodings(header):
+    encodings = {}
+    for item in header.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encodings[coding.lower()] = quality
+    return encodings
+
+
+def accepts_gzip(request):
+    encodings = get_accepted_encodings(
+        request.headers.get('Accept-Encoding', '')
+    )
+    return encodings.get('gzip', encodings.get('*', 0)) > 0
+
+
 def product_list_api(request):
-    products = Product.objects.select_related('category').available()
+    catalog = get_product_catalog()
+    gzip_accepted = accepts_gzip(request)
+    if gzip_accepted:
+        content, etag = catalog['gzip_content'], catalog['gzip_etag']
+    else:
+        content, etag = catalog['content'], catalog['etag']
 
-    dumped_products = []
-    for product in products:
-        dumped_product = {
-            'id': product.id,
-            'name': product.name,
-            'price': product.price,
-            'special_status': product.special_status,
-            'description': product.description,
-            'category': {
-                'id': product.category.id,
-                'name': product.category.name,
-            } if product.category else None,
-            'image': product.image.url,
-            'restaurant': {
-                'id': product.id,
-                'name': product.name,
-            }
-        }
-        dumped_products.append(dumped_product)
-    return JsonResponse(dumped_products, safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
-    })
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type='application/json')
+        if gzip_accepted:
+            response['Content-Encoding'] = 'gzip'
+    response['ETag'] = etag
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
 
 
 class OrderAPIView(APIView):
@@ -1,7 +1,15 @@
 from django.contrib import admin
-from .models import Place
+from .models import Place, GeocodeJob
 
 
 @admin.register(Place)
 class PlaceAdmin(admin.ModelAdmin):
-    pass
+    search_fields = ['address']
+    list_display = ['address', 'status', 'source', 'attempts', 'next_retry_at']
+    list_filter = ['status', 'source']
+
+
+@admin.register(GeocodeJob)
+class GeocodeJobAdmin(admin.ModelAdmin):
+    list_display = ['address', 'created_at', 'taken_at']
+    readonly_fields = ['created_at', 'taken_at']
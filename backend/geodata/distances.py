@@ -0,0 +1,39 @@
+import numpy as np
+
+
+EARTH_RADIUS = 6371008.8
+
+
+def haversine(from_lat, from_lon, to_lat, to_lon):
+    a = (
+        np.sin((to_lat - from_lat) / 2) ** 2
+        + np.cos(from_lat) * np.cos(to_lat)
+        * np.sin((to_lon - from_lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def to_radians(coordinates):
+    return np.radians(np.asarray(coordinates, dtype=float).reshape(-1, 2))
+
+
+def haversine_matrix(from_coordinates, to_coordinates):
+    from_points = to_radians(from_coordinates)
+    to_points = to_radians(to_coordinates)
+    return haversine(
+        from_points[:, 0, np.newaxis],
+        from_points[:, 1, np.newaxis],
+        to_points[np.newaxis, :, 0],
+        to_points[np.newaxis, :, 1],
+    )
+
+
+def haversine_pairwise(from_coordinates, to_coordinates):
+    from_points = to_radians(from_coordinates)
+    to_points = to_radians(to_coordinates)
+    return haversine(
+        from_points[:, 0],
+        from_points[:, 1],
+        to_points[:, 0],
+        to_points[:, 1],
+    )
@@ -0,0 +1,135 @@
+import json
+import time
+from threading import Lock
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+
+class GeocoderError(Exception):
+    pass
+
+
+class AddressNotFound(GeocoderError):
+    pass
+
+
+class GeocoderUnavailable(GeocoderError):
+    pass
+
+
+class YandexGeocoder:
+    base_url = 'https://geocode-maps.yandex.ru/1.x'
+
+    def __init__(self):
+        self.apikey = settings.YANDEX_API_KEY
+        self.timeout = (
+            settings.GEOCODER_CONNECT_TIMEOUT,
+            settings.GEOCODER_READ_TIMEOUT
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.GEOCODER_POOL_SIZE
+        ))
+
+    def geocode(self, address):
+        response = self.session.get(self.base_url, params={
+            'geocode': address,
+            'apikey': self.apikey,
+            'format': 'json',
+        }, timeout=self.timeout)
+        response.raise_for_status()
+        found_places = response.json()['response']['GeoObjectCollection']['featureMember']
+
+        if not found_places:
+            raise AddressNotFound(address)
+
+        most_relevant = found_places[0]
+        lon, lat = most_relevant['GeoObject']['Point']['pos'].split(' ')
+        return (lon, lat)
+
+
+class FixtureGeocoder:
+    def __init__(self):
+        self.places = {}
+        if settings.GEOCODER_FIXTURE_PATH:
+            with open(settings.GEOCODER_FIXTURE_PATH, encoding='utf-8') as file:
+                self.places = json.load(file)
+
+    def geocode(self, address):
+        try:
+            lon, lat = self.places[address]
+        except KeyError:
+            raise AddressNotFound(address)
+        return (lon, lat)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures_count = 0
+        self.opened_at = None
+        self._lock = Lock()
+
+    def is_open(self):
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # пропускаем пробный запрос, при неудаче цепь снова разомкнётся
+                self.opened_at = None
+                self.failures_count = self.failure_threshold - 1
+                return False
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures_count = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures_count += 1
+            if self.failures_count >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class GeocoderClient:
+    def __init__(self, backend, breaker):
+        self.backend = backend
+        self.breaker = breaker
+
+    def fetch_coordinates(self, address):
+        if self.breaker.is_open():
+            raise GeocoderUnavailable('геокодер временно недоступен')
+        try:
+            coordinates = self.backend.geocode(address)
+        except AddressNotFound:
+            self.breaker.record_success()
+            raise
+        except (requests.RequestException, ValueError, KeyError) as error:
+            self.breaker.record_failure()
+            raise GeocoderUnavailable(error) from error
+        self.breaker.record_success()
+        return coordinates
+
+
+_geocoder = None
+
+
+def get_geocoder():
+    global _geocoder
+    if _geocoder is None:
+        backend_class = import_string(settings.GEOCODER_BACKEND)
+        _geocoder = GeocoderClient(
+            backend_class(),
+            CircuitBreaker(
+                settings.GEOCODER_FAILURE_THRESHOLD,
+                settings.GEOCODER_RESET_TIMEOUT
+            )
+        )
+    return _geocoder
@@ -0,0 +1,86 @@
+import math
+
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+MAX_PRECISION = 12
+METERS_PER_DEGREE = 111320
+
+
+def encode(latitude, longitude, precision=MAX_PRECISION):
+    latitude, longitude = float(latitude), float(longitude)
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bits_count = 0
+    even_bit = True
+    while len(geohash) < precision:
+        if even_bit:
+            value, value_range = longitude, lon_range
+        else:
+            value, value_range = latitude, lat_range
+        middle = (value_range[0] + value_range[1]) / 2
+        if value >= middle:
+            bits = bits * 2 + 1
+            value_range[0] = middle
+        else:
+            bits = bits * 2
+            value_range[1] = middle
+        even_bit = not even_bit
+        bits_count += 1
+        if bits_count == 5:
+            geohash.append(BASE32[bits])
+            bits = 0
+            bits_count = 0
+    return ''.join(geohash)
+
+
+def get_cell_size(precision):
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180 / 2 ** lat_bits, 360 / 2 ** lon_bits
+
+
+def decode(geohash):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even_bit = True
+    for char in geohash:
+        bits = BASE32.index(char)
+        for shift in range(4, -1, -1):
+            value_range = lon_range if even_bit else lat_range
+            middle = (value_range[0] + value_range[1]) / 2
+            if bits >> shift & 1:
+                value_range[0] = middle
+            else:
+                value_range[1] = middle
+            even_bit = not even_bit
+    return (
+        (lat_range[0] + lat_range[1]) / 2,
+        (lon_range[0] + lon_range[1]) / 2,
+    )
+
+
+def get_neighbourhood(geohash):
+    latitude, longitude = decode(geohash)
+    lat_size, lon_size = get_cell_size(len(geohash))
+    cells = set()
+    for lat_step in (-1, 0, 1):
+        for lon_step in (-1, 0, 1):
+            neighbour_lat = latitude + lat_step * lat_size
+            if not -90 <= neighbour_lat <= 90:
+                continue
+            neighbour_lon = (longitude + lon_step * lon_size + 180) % 360 - 180
+            cells.add(encode(neighbour_lat, neighbour_lon, len(geohash)))
+    return cells
+
+
+def get_precision_for_radius(radius, latitude):
+    lon_scale = max(math.cos(math.radians(float(latitude))), 0.01)
+    for precision in range(MAX_PRECISION, 0, -1):
+        lat_size, lon_size = get_cell_size(precision)
+        height = lat_size * METERS_PER_DEGREE
+        width = lon_size * METERS_PER_DEGREE * lon_scale
+        if min(height, width) >= radius:
+            return precision
+    return 1
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+
+from geodata.models import GeocodeJob, Place, PlaceDistance
+
+
+class Command(BaseCommand):
+    help = 'Объединяет места с одинаковым нормализованным адресом'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать дубликаты, ничего не удаляя'
+        )
+
+    def handle(self, *args, **options):
+        duplicate_keys = (
+            Place.objects
+            .exclude(normalized_address='')
+            .values('normalized_address')
+            .annotate(places_count=Count('id'))
+            .filter(places_count__gt=1)
+            .values_list('normalized_address', flat=True)
+        )
+        removed_count = 0
+        for key in list(duplicate_keys):
+            with transaction.atomic():
+                places = list(
+                    Place.objects
+                    .filter(normalized_address=key)
+                    .annotate(is_resolved=Case(
+                        When(status='OK', then=Value(0)),
+                        default=Value(1),
+                        output_field=IntegerField()
+                    ))
+                    .order_by('is_resolved', '-updated_at')
+                )
+                kept_place, duplicates = places[0], places[1:]
+                self.stdout.write(
+                    f'{kept_place.address}: '
+                    + ', '.join(place.address for place in duplicates)
+                )
+                removed_count += len(duplicates)
+                if options['dry_run']:
+                    continue
+                PlaceDistance.objects.filter(
+                    Q(from_place__in=duplicates) | Q(to_place__in=duplicates)
+                ).delete()
+                for relation in Place._meta.related_objects:
+                    relation.related_model.objects.filter(**{
+                        f'{relation.field.name}__in': duplicates
+                    }).update(**{relation.field.name: kept_place})
+                duplicate_addresses = [place.address for place in duplicates]
+                GeocodeJob.objects.filter(
+                    address__in=duplicate_addresses
+                ).delete()
+                Place.objects.filter(
+                    pk__in=[place.pk for place in duplicates]
+                ).delete()
+        self.stdout.write(f'Дубликатов: {removed_count}')
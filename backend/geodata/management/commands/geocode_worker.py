@@ -0,0 +1,115 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from geodata.geocoder import GeocoderError, GeocoderUnavailable, get_geocoder
+from geodata.models import GeocodeJob, Place
+from geodata.places import (
+    mark_geocoded,
+    mark_geocoding_failed,
+    schedule_geocoding_retries,
+)
+
+
+class Command(BaseCommand):
+    help = 'Геокодирует адреса из очереди задач и сохраняет их в Place'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Сколько задач забирать из очереди за один раз'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=5,
+            help='Пауза в секундах, когда очередь пуста'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать очередь и завершиться'
+        )
+
+    def handle(self, *args, **options):
+        geocoder = get_geocoder()
+
+        while True:
+            scheduled = schedule_geocoding_retries()
+            if scheduled:
+                self.stdout.write(f'Повторно поставлено в очередь: {scheduled}')
+            processed = self.process_batch(geocoder, options['batch_size'])
+            if processed:
+                self.stdout.write(f'Обработано адресов: {processed}')
+                continue
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
+
+    def process_batch(self, geocoder, batch_size):
+        jobs = self.claim_jobs(batch_size)
+        if not jobs:
+            return 0
+        places = Place.objects.in_bulk(
+            [job.address for job in jobs],
+            field_name='address'
+        )
+        processed_count = 0
+        for job_index, job in enumerate(jobs):
+            place = places.get(job.address)
+            if place and place.status == 'OK':
+                job.delete()
+                processed_count += 1
+                continue
+            try:
+                coordinates = geocoder.fetch_coordinates(job.address)
+            except GeocoderUnavailable as error:
+                self.stderr.write(f'Геокодер недоступен: {error}')
+                pending_jobs = jobs[job_index:]
+                GeocodeJob.objects.filter(
+                    pk__in=[pending_job.pk for pending_job in pending_jobs]
+                ).update(taken_at=None)
+                break
+            except GeocoderError:
+                coordinates = None
+            self.save_result(job, coordinates)
+            processed_count += 1
+        return processed_count
+
+    def claim_jobs(self, batch_size):
+        now = timezone.now()
+        stale_taken_at = now - timedelta(seconds=settings.GEOCODER_JOB_TIMEOUT)
+        with transaction.atomic():
+            jobs = list(
+                GeocodeJob.objects
+                .filter(Q(taken_at__isnull=True) | Q(taken_at__lt=stale_taken_at))
+                .select_for_update(skip_locked=True)
+                .order_by('created_at')[:batch_size]
+            )
+            GeocodeJob.objects.filter(
+                pk__in=[job.pk for job in jobs]
+            ).update(taken_at=now)
+        return jobs
+
+    def save_result(self, job, coordinates):
+        with transaction.atomic():
+            place = (
+                Place.objects
+                .select_for_update()
+                .filter(address=job.address)
+                .first()
+            ) or Place(address=job.address)
+            if place.status != 'OK':
+                if coordinates:
+                    longitude, latitude = coordinates
+                    mark_geocoded(place, longitude, latitude)
+                else:
+                    mark_geocoding_failed(place)
+            job.delete()
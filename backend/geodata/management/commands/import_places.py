@@ -0,0 +1,171 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from geodata import geohash
+from geodata.models import Place, PlaceDistance
+from geodata.normalization import normalize_address
+
+
+ADDRESS_MAX_LENGTH = Place._meta.get_field('address').max_length
+
+CREATE_STAGING_TABLE = '''
+    CREATE TEMPORARY TABLE place_import (
+        address varchar(150) NOT NULL,
+        normalized_address text NOT NULL,
+        longitude numeric(20, 17) NOT NULL,
+        latitude numeric(20, 17) NOT NULL,
+        geohash varchar(12) NOT NULL
+    ) ON COMMIT DROP
+'''
+
+SELECT_CHANGED_PLACES = f'''
+    CREATE TEMPORARY TABLE changed_places ON COMMIT DROP AS
+    SELECT place.id
+    FROM {Place._meta.db_table} place
+    JOIN place_import ON place_import.address = place.address
+    WHERE place.longitude IS DISTINCT FROM place_import.longitude
+        OR place.latitude IS DISTINCT FROM place_import.latitude
+'''
+
+DELETE_STALE_DISTANCES = f'''
+    DELETE FROM {PlaceDistance._meta.db_table}
+    WHERE from_place_id IN (SELECT id FROM changed_places)
+        OR to_place_id IN (SELECT id FROM changed_places)
+'''
+
+UPSERT_PLACES = f'''
+    INSERT INTO {Place._meta.db_table} (
+        address, normalized_address, longitude, latitude, geohash,
+        status, source, attempts, next_retry_at, updated_at
+    )
+    SELECT DISTINCT ON (address)
+        address, normalized_address, longitude, latitude, geohash,
+        'OK', 'IMPT', 0, NULL, now()
+    FROM place_import
+    ORDER BY address
+    ON CONFLICT (address) DO UPDATE SET
+        normalized_address = EXCLUDED.normalized_address,
+        longitude = EXCLUDED.longitude,
+        latitude = EXCLUDED.latitude,
+        geohash = EXCLUDED.geohash,
+        status = 'OK',
+        source = CASE
+            WHEN {Place._meta.db_table}.source = 'REST' THEN 'REST'
+            ELSE 'IMPT'
+        END,
+        attempts = 0,
+        next_retry_at = NULL,
+        updated_at = EXCLUDED.updated_at
+'''
+
+
+def escape_copy_value(value):
+    return (
+        value
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+class LinesStream:
+    def __init__(self, lines):
+        self.lines = lines
+        self.buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            try:
+                self.buffer += next(self.lines)
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self.buffer)
+        chunk, self.buffer = self.buffer[:size], self.buffer[size:]
+        return chunk
+
+
+class Command(BaseCommand):
+    help = 'Загружает справочник адресов (адрес, долгота, широта) в Place через COPY'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV или TSV файл')
+        parser.add_argument(
+            '--delimiter',
+            help='Разделитель полей, по умолчанию определяется по расширению'
+        )
+        parser.add_argument(
+            '--skip-header',
+            action='store_true',
+            help='Пропустить первую строку файла'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Импорт через COPY работает только с PostgreSQL')
+
+        delimiter = options['delimiter']
+        if not delimiter:
+            delimiter = '\t' if options['path'].endswith('.tsv') else ','
+
+        self.imported_count = 0
+        self.skipped_count = 0
+        started_at = time.monotonic()
+        with open(options['path'], encoding='utf-8', newline='') as file:
+            rows = csv.reader(file, delimiter=delimiter)
+            if options['skip_header']:
+                next(rows, None)
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(CREATE_STAGING_TABLE)
+                cursor.copy_expert(
+                    'COPY place_import FROM STDIN',
+                    LinesStream(self.generate_lines(rows, started_at))
+                )
+                cursor.execute(SELECT_CHANGED_PLACES)
+                cursor.execute(DELETE_STALE_DISTANCES)
+                cursor.execute(UPSERT_PLACES)
+                upserted_count = cursor.rowcount
+
+        elapsed = time.monotonic() - started_at
+        self.stdout.write(
+            f'Прочитано строк: {self.imported_count}, '
+            f'пропущено: {self.skipped_count}, '
+            f'записано мест: {upserted_count}\n'
+            f'{elapsed:.1f} с, {self.imported_count / max(elapsed, 1e-6):.0f} строк/с'
+        )
+
+    def generate_lines(self, rows, started_at):
+        for row in rows:
+            try:
+                address, longitude, latitude = row
+                longitude, latitude = float(longitude), float(latitude)
+            except ValueError:
+                self.skipped_count += 1
+                continue
+            address = address.strip()
+            if not address or len(address) > ADDRESS_MAX_LENGTH:
+                self.skipped_count += 1
+                continue
+            if not (-180 <= longitude <= 180 and -90 <= latitude <= 90):
+                self.skipped_count += 1
+                continue
+
+            self.imported_count += 1
+            if self.imported_count % 100000 == 0:
+                elapsed = time.monotonic() - started_at
+                self.stdout.write(
+                    f'{self.imported_count} строк, '
+                    f'{self.imported_count / elapsed:.0f} строк/с'
+                )
+            values = [
+                address,
+                normalize_address(address),
+                repr(longitude),
+                repr(latitude),
+                geohash.encode(latitude, longitude),
+            ]
+            yield '\t'.join(escape_copy_value(value) for value in values) + '\n'
@@ -0,0 +1,103 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from geodata.geocoder import GeocoderError, GeocoderUnavailable, get_geocoder
+from geodata.models import Place
+from geodata.places import mark_geocoded
+
+
+SOURCES = [code for code, _ in Place._meta.get_field('source').choices]
+# координаты из справочника адресов выверены вручную, геокодер их не улучшит
+DEFAULT_SOURCES = ['ORDR', 'REST']
+
+
+class Command(BaseCommand):
+    help = 'Обновляет координаты мест, которые давно не геокодировались'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=30,
+            help='Обновлять места старше стольких дней'
+        )
+        parser.add_argument(
+            '--source',
+            action='append',
+            choices=SOURCES,
+            help='Обновлять места только из этого источника, можно указать '
+                 'несколько раз. По умолчанию все, кроме справочника адресов'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Сколько мест обновлять за один проход'
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=2,
+            help='Не больше стольких запросов к геокодеру в секунду'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, обновляя места партиями'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=600,
+            help='Пауза в секундах, когда устаревших мест не осталось'
+        )
+
+    def handle(self, *args, **options):
+        geocoder = get_geocoder()
+        max_age = timedelta(days=options['older_than'])
+        sources = options['source'] or DEFAULT_SOURCES
+
+        while True:
+            refreshed = self.refresh_batch(
+                geocoder,
+                timezone.now() - max_age,
+                sources,
+                options['batch_size'],
+                1 / options['rate']
+            )
+            self.stdout.write(f'Обновлено мест: {refreshed}')
+            if not options['loop']:
+                break
+            if refreshed < options['batch_size']:
+                time.sleep(options['interval'])
+
+    def refresh_batch(self, geocoder, updated_before, sources, batch_size,
+                      delay):
+        places = (
+            Place.objects
+            .filter(
+                status='OK',
+                source__in=sources,
+                updated_at__lt=updated_before
+            )
+            .order_by('updated_at')[:batch_size]
+        )
+        refreshed = 0
+        for place in places:
+            started_at = time.monotonic()
+            try:
+                longitude, latitude = geocoder.fetch_coordinates(place.address)
+            except GeocoderUnavailable as error:
+                self.stderr.write(f'Геокодер недоступен: {error}')
+                break
+            except GeocoderError:
+                # оставляем старые координаты, но не берём место в работу снова
+                place.save(update_fields=['updated_at'])
+            else:
+                mark_geocoded(place, longitude, latitude)
+            refreshed += 1
+            time.sleep(max(0, delay - (time.monotonic() - started_at)))
+        return refreshed
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:11
+
+from django.db import migrations, models
+
+from geodata.geohash import encode
+
+
+def fill_geohashes(apps, schema_editor):
+    Place = apps.get_model('geodata', 'Place')
+    places = []
+    for place in Place.objects.only('latitude', 'longitude').iterator():
+        place.geohash = encode(place.latitude, place.longitude)
+        places.append(place)
+        if len(places) == 1000:
+            Place.objects.bulk_update(places, ['geohash'])
+            places = []
+    Place.objects.bulk_update(places, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geodata', '0003_geocodejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, max_length=12, verbose_name='Геохеш'),
+        ),
+        migrations.RunPython(fill_geohashes, migrations.RunPython.noop),
+    ]
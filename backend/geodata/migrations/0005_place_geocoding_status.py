@@ -0,0 +1,53 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:13
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_failed_places(apps, schema_editor):
+    Place = apps.get_model('geodata', 'Place')
+    Place.objects.filter(latitude=0, longitude=0).update(
+        status='FAIL',
+        latitude=None,
+        longitude=None,
+        geohash='',
+        attempts=1,
+        next_retry_at=timezone.now()
+    )
+    Place.objects.filter(status='PEND').update(status='OK')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geodata', '0004_place_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0, verbose_name='Неудачных попыток'),
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='next_retry_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Следующая попытка'),
+        ),
+        migrations.AddField(
+            model_name='place',
+            name='status',
+            field=models.CharField(choices=[('OK', 'Координаты найдены'), ('FAIL', 'Ошибка геокодирования'), ('PEND', 'Ожидает геокодирования')], db_index=True, default='PEND', max_length=4, verbose_name='Статус геокодирования'),
+        ),
+        migrations.AlterField(
+            model_name='place',
+            name='latitude',
+            field=models.DecimalField(blank=True, decimal_places=17, max_digits=20, null=True, verbose_name='Широта'),
+        ),
+        migrations.AlterField(
+            model_name='place',
+            name='longitude',
+            field=models.DecimalField(blank=True, decimal_places=17, max_digits=20, null=True, verbose_name='Долгота'),
+        ),
+        migrations.RunPython(mark_failed_places, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:14
+
+from django.db import migrations, models
+
+from geodata.normalization import normalize_address
+
+
+def fill_normalized_addresses(apps, schema_editor):
+    Place = apps.get_model('geodata', 'Place')
+    places = []
+    for place in Place.objects.only('address').iterator():
+        place.normalized_address = normalize_address(place.address)
+        places.append(place)
+        if len(places) == 1000:
+            Place.objects.bulk_update(places, ['normalized_address'])
+            places = []
+    Place.objects.bulk_update(places, ['normalized_address'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geodata', '0005_place_geocoding_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='normalized_address',
+            field=models.CharField(blank=True, db_index=True, max_length=150, verbose_name='Нормализованный адрес'),
+        ),
+        migrations.RunPython(
+            fill_normalized_addresses,
+            migrations.RunPython.noop
+        ),
+    ]
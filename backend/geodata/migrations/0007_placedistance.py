@@ -0,0 +1,28 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geodata', '0006_place_normalized_address'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlaceDistance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('meters', models.FloatField(verbose_name='Расстояние, м')),
+                ('from_place', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='distances_from', to='geodata.place', verbose_name='Откуда')),
+                ('to_place', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='distances_to', to='geodata.place', verbose_name='Куда')),
+            ],
+            options={
+                'verbose_name': 'расстояние между местами',
+                'verbose_name_plural': 'расстояния между местами',
+                'unique_together': {('from_place', 'to_place')},
+            },
+        ),
+    ]
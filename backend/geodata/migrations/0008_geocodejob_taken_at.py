@@ -0,0 +1,18 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geodata', '0007_placedistance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='geocodejob',
+            name='taken_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Взята в работу'),
+        ),
+    ]
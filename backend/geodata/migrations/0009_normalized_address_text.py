@@ -0,0 +1,18 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geodata', '0008_geocodejob_taken_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='place',
+            name='normalized_address',
+            field=models.TextField(blank=True, db_index=True, verbose_name='Нормализованный адрес'),
+        ),
+    ]
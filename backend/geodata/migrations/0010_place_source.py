@@ -0,0 +1,25 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:34
+
+from django.db import migrations, models
+
+
+def mark_restaurant_places(apps, schema_editor):
+    Place = apps.get_model('geodata', 'Place')
+    Place.objects.filter(restaurants__isnull=False).update(source='REST')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geodata', '0009_normalized_address_text'),
+        ('foodcartapp', '0060_restaurant_place'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='source',
+            field=models.CharField(choices=[('ORDR', 'Адрес заказа'), ('REST', 'Адрес ресторана'), ('IMPT', 'Справочник адресов')], db_index=True, default='ORDR', max_length=4, verbose_name='Источник адреса'),
+        ),
+        migrations.RunPython(mark_restaurant_places, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+
+def clear_place_distances(apps, schema_editor):
+    PlaceDistance = apps.get_model('geodata', 'PlaceDistance')
+    PlaceDistance.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geodata', '0010_place_source'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_place_distances, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='placedistance',
+            name='from_latitude',
+            field=models.DecimalField(decimal_places=17, default=0, max_digits=20, verbose_name='Широта откуда'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='placedistance',
+            name='from_longitude',
+            field=models.DecimalField(decimal_places=17, default=0, max_digits=20, verbose_name='Долгота откуда'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='placedistance',
+            name='to_latitude',
+            field=models.DecimalField(decimal_places=17, default=0, max_digits=20, verbose_name='Широта куда'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='placedistance',
+            name='to_longitude',
+            field=models.DecimalField(decimal_places=17, default=0, max_digits=20, verbose_name='Долгота куда'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.21 on 2026-10-18 02:56
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geodata', '0011_placedistance_coordinates'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='placedistance',
+            name='from_latitude',
+        ),
+        migrations.RemoveField(
+            model_name='placedistance',
+            name='from_longitude',
+        ),
+        migrations.RemoveField(
+            model_name='placedistance',
+            name='to_latitude',
+        ),
+        migrations.RemoveField(
+            model_name='placedistance',
+            name='to_longitude',
+        ),
+    ]
@@ -1,4 +1,44 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import Q
+
+from . import geohash
+from .normalization import normalize_address
+
+
+def to_decimal(value):
+    return None if value is None else Decimal(str(value))
+
+
+class PlaceQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        if 'latitude' not in kwargs and 'longitude' not in kwargs:
+            return super().update(**kwargs)
+        # иначе в PlaceDistance останутся расстояния по старым координатам
+        with transaction.atomic(using=self.db):
+            place_ids = list(self.values_list('pk', flat=True))
+            PlaceDistance.objects.filter(
+                Q(from_place__in=place_ids) | Q(to_place__in=place_ids)
+            ).delete()
+            return super().update(**kwargs)
+
+    def nearby(self, latitude, longitude, radius):
+        return self.around([(latitude, longitude)], radius)
+
+    def around(self, points, radius):
+        cells = set()
+        for latitude, longitude in points:
+            precision = geohash.get_precision_for_radius(radius, latitude)
+            cells |= geohash.get_neighbourhood(
+                geohash.encode(latitude, longitude, precision)
+            )
+        if not cells:
+            return self.none()
+        query = Q()
+        for cell in cells:
+            query |= Q(geohash__startswith=cell)
+        return self.filter(query)
 
 
 class Place(models.Model):
@@ -7,20 +47,156 @@ class Place(models.Model):
         max_length=150,
         unique=True
     )
+    normalized_address = models.TextField(
+        'Нормализованный адрес',
+        blank=True,
+        db_index=True
+    )
     longitude = models.DecimalField(
         'Долгота',
         max_digits=20,
-        decimal_places=17
+        decimal_places=17,
+        null=True,
+        blank=True
     )
     latitude = models.DecimalField(
         'Широта',
         max_digits=20,
-        decimal_places=17
+        decimal_places=17,
+        null=True,
+        blank=True
+    )
+    status = models.CharField(
+        'Статус геокодирования',
+        max_length=4,
+        choices=[
+            ('OK', 'Координаты найдены'),
+            ('FAIL', 'Ошибка геокодирования'),
+            ('PEND', 'Ожидает геокодирования')
+        ],
+        default='PEND',
+        db_index=True
+    )
+    source = models.CharField(
+        'Источник адреса',
+        max_length=4,
+        choices=[
+            ('ORDR', 'Адрес заказа'),
+            ('REST', 'Адрес ресторана'),
+            ('IMPT', 'Справочник адресов')
+        ],
+        default='ORDR',
+        db_index=True
+    )
+    attempts = models.PositiveIntegerField(
+        'Неудачных попыток',
+        default=0
+    )
+    next_retry_at = models.DateTimeField(
+        'Следующая попытка',
+        null=True,
+        blank=True,
+        db_index=True
+    )
+    geohash = models.CharField(
+        'Геохеш',
+        max_length=geohash.MAX_PRECISION,
+        blank=True,
+        db_index=True
     )
     updated_at = models.DateTimeField(
         'Последнее обновление',
         auto_now=True
     )
 
+    objects = PlaceQuerySet.as_manager()
+
     def __str__(self):
         return f'место по адресу: {self.address}'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        place = super().from_db(db, field_names, values)
+        place._loaded_coordinates = (
+            place.__dict__.get('latitude'),
+            place.__dict__.get('longitude'),
+        )
+        return place
+
+    def save(self, *args, **kwargs):
+        loaded_coordinates = getattr(self, '_loaded_coordinates', None)
+        coordinates_changed = (
+            loaded_coordinates is not None
+            and tuple(map(to_decimal, loaded_coordinates))
+            != (to_decimal(self.latitude), to_decimal(self.longitude))
+        )
+        self.normalized_address = normalize_address(self.address)
+        if self.latitude is None or self.longitude is None:
+            self.geohash = ''
+        else:
+            self.geohash = geohash.encode(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {
+                *update_fields,
+                'normalized_address',
+                'geohash',
+            }
+        super().save(*args, **kwargs)
+        if coordinates_changed:
+            PlaceDistance.objects.filter(
+                Q(from_place=self) | Q(to_place=self)
+            ).delete()
+        self._loaded_coordinates = (self.latitude, self.longitude)
+
+
+class GeocodeJob(models.Model):
+    address = models.CharField(
+        'Адрес',
+        max_length=150,
+        unique=True
+    )
+    created_at = models.DateTimeField(
+        'Поставлена в очередь',
+        auto_now_add=True,
+        db_index=True
+    )
+    taken_at = models.DateTimeField(
+        'Взята в работу',
+        null=True,
+        blank=True,
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'задача геокодирования'
+        verbose_name_plural = 'задачи геокодирования'
+
+    def __str__(self):
+        return f'геокодирование адреса: {self.address}'
+
+
+class PlaceDistance(models.Model):
+    from_place = models.ForeignKey(
+        Place,
+        on_delete=models.CASCADE,
+        related_name='distances_from',
+        verbose_name='Откуда'
+    )
+    to_place = models.ForeignKey(
+        Place,
+        on_delete=models.CASCADE,
+        related_name='distances_to',
+        verbose_name='Куда'
+    )
+    meters = models.FloatField('Расстояние, м')
+
+    class Meta:
+        verbose_name = 'расстояние между местами'
+        verbose_name_plural = 'расстояния между местами'
+        unique_together = [
+            ['from_place', 'to_place']
+        ]
+
+    def __str__(self):
+        return f'{self.from_place} → {self.to_place}'
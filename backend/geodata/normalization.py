@@ -0,0 +1,40 @@
+import re
+
+
+SKIPPED_WORDS = {
+    'г', 'гор', 'город',
+    'ул', 'улица',
+    'д', 'дом',
+}
+
+ABBREVIATIONS = {
+    'пр': 'проспект',
+    'пр-т': 'проспект',
+    'просп': 'проспект',
+    'пер': 'переулок',
+    'пл': 'площадь',
+    'ш': 'шоссе',
+    'б-р': 'бульвар',
+    'бул': 'бульвар',
+    'наб': 'набережная',
+    'мкр': 'микрорайон',
+    'к': 'корпус',
+    'корп': 'корпус',
+    'стр': 'строение',
+    'кв': 'квартира',
+    'обл': 'область',
+}
+
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s/-]+')
+
+
+def normalize_address(address):
+    address = address.casefold().replace('ё', 'е')
+    address = PUNCTUATION_PATTERN.sub(' ', address)
+    words = []
+    for word in address.split():
+        word = word.strip('-')
+        if not word or word in SKIPPED_WORDS:
+            continue
+        words.append(ABBREVIATIONS.get(word, word))
+    return ' '.join(words)
@@ -0,0 +1,195 @@
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from threading import Lock
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .distances import haversine_pairwise
+from .models import Place, PlaceDistance, GeocodeJob
+from .normalization import normalize_address
+
+
+class PlaceCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, address):
+        with self._lock:
+            item = self._items.get(address)
+            if item is None:
+                return None
+            place, expires_at = item
+            if expires_at < time.monotonic():
+                del self._items[address]
+                return None
+            self._items.move_to_end(address)
+            return place
+
+    def set(self, address, place):
+        with self._lock:
+            self._items[address] = (place, time.monotonic() + self.ttl)
+            self._items.move_to_end(address)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def discard(self, address):
+        with self._lock:
+            self._items.pop(address, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+place_cache = PlaceCache(
+    maxsize=settings.PLACE_CACHE_SIZE,
+    ttl=settings.PLACE_CACHE_TTL
+)
+
+
+def get_places(addresses):
+    keys = {address: normalize_address(address) for address in addresses}
+    places_by_key = {}
+    missing_keys = set()
+    for key in set(keys.values()):
+        place = place_cache.get(key)
+        if place is None:
+            missing_keys.add(key)
+        else:
+            places_by_key[key] = place
+    if missing_keys:
+        for place in (
+            Place.objects
+            .filter(normalized_address__in=missing_keys)
+            .order_by('normalized_address', '-updated_at')
+        ):
+            known_place = places_by_key.get(place.normalized_address)
+            if known_place and known_place.status == 'OK':
+                continue
+            places_by_key[place.normalized_address] = place
+            if place.status == 'OK':
+                place_cache.set(place.normalized_address, place)
+    return {
+        address: places_by_key[key]
+        for address, key in keys.items()
+        if key in places_by_key
+    }
+
+
+def get_place(address):
+    return get_places([address]).get(address)
+
+
+def enqueue_geocoding(address, source='ORDR'):
+    if not address:
+        return None
+    place = get_place(address)
+    if place is None:
+        place, _ = Place.objects.get_or_create(
+            address=address,
+            defaults={'source': source}
+        )
+        GeocodeJob.objects.get_or_create(address=address)
+    if source != 'ORDR' and place.source == 'ORDR':
+        Place.objects.filter(pk=place.pk).update(
+            source=source,
+            updated_at=timezone.now()
+        )
+        place.source = source
+    return place
+
+
+def get_retry_delay(attempts):
+    delay = settings.GEOCODER_RETRY_BASE_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.GEOCODER_RETRY_MAX_DELAY))
+
+
+def mark_geocoded(place, longitude, latitude):
+    place.longitude = longitude
+    place.latitude = latitude
+    place.status = 'OK'
+    place.attempts = 0
+    place.next_retry_at = None
+    place.save()
+
+
+def mark_geocoding_failed(place):
+    place.status = 'FAIL'
+    place.attempts += 1
+    if place.attempts < settings.GEOCODER_MAX_ATTEMPTS:
+        place.next_retry_at = timezone.now() + get_retry_delay(place.attempts)
+    else:
+        place.next_retry_at = None
+    place.save()
+
+
+def schedule_geocoding_retries():
+    with transaction.atomic():
+        addresses = list(
+            Place.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='FAIL', next_retry_at__lte=timezone.now())
+            .values_list('address', flat=True)
+        )
+        if not addresses:
+            return 0
+        GeocodeJob.objects.bulk_create(
+            [GeocodeJob(address=address) for address in addresses],
+            ignore_conflicts=True
+        )
+        Place.objects.filter(address__in=addresses).update(next_retry_at=None)
+    return len(addresses)
+
+
+def get_place_distances(place_pairs):
+    pairs = {
+        (from_place.id, to_place.id): (from_place, to_place)
+        for from_place, to_place in place_pairs
+    }
+    if not pairs:
+        return {}
+    cached_distances = (
+        PlaceDistance.objects
+        .filter(
+            from_place__in={from_id for from_id, _ in pairs},
+            to_place__in={to_id for _, to_id in pairs},
+        )
+        .values_list('from_place', 'to_place', 'meters')
+    )
+    distances = {
+        (from_id, to_id): meters
+        for from_id, to_id, meters in cached_distances
+        if (from_id, to_id) in pairs
+    }
+    missing_pairs = [key for key in pairs if key not in distances]
+    if missing_pairs:
+        meters = haversine_pairwise(
+            [
+                (pairs[key][0].latitude, pairs[key][0].longitude)
+                for key in missing_pairs
+            ],
+            [
+                (pairs[key][1].latitude, pairs[key][1].longitude)
+                for key in missing_pairs
+            ]
+        )
+        new_distances = dict(zip(missing_pairs, meters.tolist()))
+        PlaceDistance.objects.bulk_create(
+            [
+                PlaceDistance(
+                    from_place_id=from_id,
+                    to_place_id=to_id,
+                    meters=distance
+                )
+                for (from_id, to_id), distance in new_distances.items()
+            ],
+            ignore_conflicts=True
+        )
+        distances.update(new_distances)
+    return distances
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Place
+from .places import place_cache
+
+
+@receiver(post_save, sender=Place)
+@receiver(post_delete, sender=Place)
+def discard_cached_place(sender, instance, **kwargs):
+    place_cache.discard(instance.normalized_address)
@@ -0,0 +1,121 @@
+import re
+import time
+from bisect import bisect_left
+from datetime import timedelta
+from threading import Lock
+
+from django.conf import settings
+
+from .models import Place
+from .normalization import SKIPPED_WORDS, normalize_address
+
+
+# адреса заказов в подсказки не попадают: это домашние адреса покупателей
+SUGGESTED_SOURCES = ['REST', 'IMPT']
+
+
+def normalize_prefix(query):
+    prefix = normalize_address(query)
+    if not query or not query[-1].isalnum():
+        return prefix
+    # недописанное слово может совпасть с сокращением: «пр» от «пресненская»
+    last_word = re.split(r'[^\w-]+', query.casefold().replace('ё', 'е'))[-1]
+    if normalize_address(last_word) == last_word:
+        return prefix
+    head = normalize_address(query[:-len(last_word)])
+    # «Москва, ул» в ключах записан как «москва ...», а «ул» может быть
+    # и началом названия вроде «улофа пальме», так что ищем по голове
+    if last_word in SKIPPED_WORDS:
+        return head
+    return f'{head} {last_word}'.strip()
+
+
+class AddressIndex:
+    def __init__(self, refresh_interval, rebuild_interval, refresh_overlap):
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.refresh_overlap = timedelta(seconds=refresh_overlap)
+        self.snapshot = ([], {})
+        self.updated_since = None
+        self.checked_at = None
+        self.rebuilt_at = None
+        self._refresh_lock = Lock()
+
+    def refresh(self):
+        now = time.monotonic()
+        is_rebuild = (
+            self.updated_since is None
+            or now - self.rebuilt_at > self.rebuild_interval
+        )
+        places = Place.objects.values_list(
+            'normalized_address',
+            'address',
+            'status',
+            'source',
+            'updated_at'
+        )
+        if is_rebuild:
+            addresses = {}
+            updated_since = None
+            places = places.filter(status='OK', source__in=SUGGESTED_SOURCES)
+        else:
+            _, addresses = self.snapshot
+            addresses = dict(addresses)
+            updated_since = self.updated_since
+            # строки с более ранним updated_at могли закоммититься позже
+            places = places.filter(
+                updated_at__gte=updated_since - self.refresh_overlap
+            )
+
+        for key, address, status, source, updated_at in places.iterator():
+            if updated_since is None or updated_at > updated_since:
+                updated_since = updated_at
+            if not key:
+                continue
+            if status == 'OK' and source in SUGGESTED_SOURCES:
+                addresses[key] = address
+            else:
+                addresses.pop(key, None)
+
+        self.snapshot = (sorted(addresses), addresses)
+        self.updated_since = updated_since
+        self.checked_at = now
+        if is_rebuild:
+            self.rebuilt_at = now
+
+    def refresh_if_stale(self):
+        if self.checked_at is not None \
+                and time.monotonic() - self.checked_at <= self.refresh_interval:
+            return
+        # пока один запрос обновляет индекс, остальные ищут по прежнему снимку
+        if not self._refresh_lock.acquire(blocking=self.checked_at is None):
+            return
+        try:
+            if self.checked_at is None \
+                    or time.monotonic() - self.checked_at > self.refresh_interval:
+                self.refresh()
+        finally:
+            self._refresh_lock.release()
+
+    def suggest(self, query, limit):
+        prefix = normalize_prefix(query)
+        if not prefix:
+            return []
+        self.refresh_if_stale()
+        keys, addresses = self.snapshot
+        suggestions = []
+        position = bisect_left(keys, prefix)
+        while position < len(keys) and len(suggestions) < limit:
+            key = keys[position]
+            if not key.startswith(prefix):
+                break
+            suggestions.append(addresses[key])
+            position += 1
+        return suggestions
+
+
+address_index = AddressIndex(
+    refresh_interval=settings.ADDRESS_INDEX_REFRESH_INTERVAL,
+    rebuild_interval=settings.ADDRESS_INDEX_REBUILD_INTERVAL,
+    refresh_overlap=settings.ADDRESS_INDEX_REFRESH_OVERLAP
+)
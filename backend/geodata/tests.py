@@ -1,3 +1,516 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from . import geohash
+from .geocoder import (
+    AddressNotFound,
+    CircuitBreaker,
+    GeocoderClient,
+    GeocoderUnavailable,
+)
+from .management.commands.geocode_worker import Command as GeocodeWorker
+from .models import GeocodeJob, Place, PlaceDistance
+from .normalization import normalize_address
+from .places import (
+    get_place_distances,
+    get_places,
+    get_retry_delay,
+    place_cache,
+    mark_geocoded,
+    mark_geocoding_failed,
+    schedule_geocoding_retries,
+)
+from .suggest import AddressIndex, normalize_prefix
+from .zones import get_bounding_box, points_in_polygon
+
+
+class StubGeocoder:
+    def __init__(self, places=None, error=None):
+        self.places = places or {}
+        self.error = error
+        self.addresses = []
+
+    def fetch_coordinates(self, address):
+        self.addresses.append(address)
+        if self.error:
+            raise self.error
+        try:
+            return self.places[address]
+        except KeyError:
+            raise AddressNotFound(address)
+
+
+class GeocodeWorkerTest(TestCase):
+    def setUp(self):
+        self.worker = GeocodeWorker(stdout=StringIO(), stderr=StringIO())
+
+    def test_geocodes_queued_address(self):
+        GeocodeJob.objects.create(address='Москва, Ленина 5')
+        geocoder = StubGeocoder({'Москва, Ленина 5': ('37.61', '55.75')})
+
+        self.assertEqual(self.worker.process_batch(geocoder, 10), 1)
+
+        place = Place.objects.get(address='Москва, Ленина 5')
+        self.assertEqual(place.status, 'OK')
+        self.assertEqual(
+            (float(place.longitude), float(place.latitude)),
+            (37.61, 55.75)
+        )
+        self.assertFalse(GeocodeJob.objects.exists())
+
+    def test_skips_already_geocoded_place(self):
+        Place.objects.create(
+            address='Москва, Ленина 5',
+            longitude=37.61,
+            latitude=55.75,
+            status='OK'
+        )
+        GeocodeJob.objects.create(address='Москва, Ленина 5')
+        geocoder = StubGeocoder()
+
+        self.assertEqual(self.worker.process_batch(geocoder, 10), 1)
+
+        self.assertEqual(geocoder.addresses, [])
+        self.assertFalse(GeocodeJob.objects.exists())
+
+    def test_releases_jobs_when_geocoder_is_unavailable(self):
+        GeocodeJob.objects.create(address='Москва, Ленина 5')
+        GeocodeJob.objects.create(address='Москва, Ленина 7')
+        geocoder = StubGeocoder(error=GeocoderUnavailable('таймаут'))
+
+        self.assertEqual(self.worker.process_batch(geocoder, 10), 0)
+
+        self.assertEqual(len(geocoder.addresses), 1)
+        self.assertEqual(
+            GeocodeJob.objects.filter(taken_at__isnull=True).count(),
+            2
+        )
+        self.assertFalse(Place.objects.exists())
+
+    def test_claims_only_free_and_stale_jobs(self):
+        now = timezone.now()
+        free_job = GeocodeJob.objects.create(address='Москва, Ленина 5')
+        GeocodeJob.objects.create(
+            address='Москва, Ленина 7',
+            taken_at=now - timedelta(seconds=10)
+        )
+        stale_job = GeocodeJob.objects.create(
+            address='Москва, Ленина 9',
+            taken_at=now - timedelta(days=1)
+        )
+
+        jobs = self.worker.claim_jobs(10)
+
+        self.assertEqual(
+            {job.pk for job in jobs},
+            {free_job.pk, stale_job.pk}
+        )
+        self.assertFalse(
+            GeocodeJob.objects.filter(taken_at__isnull=True).exists()
+        )
+
+
+@mock.patch('geodata.geocoder.time.monotonic')
+class CircuitBreakerTest(SimpleTestCase):
+    def test_opens_after_threshold(self, monotonic):
+        monotonic.return_value = 100
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        breaker.record_failure()
+        self.assertFalse(breaker.is_open())
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open())
+
+    def test_success_resets_failures(self, monotonic):
+        monotonic.return_value = 100
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertFalse(breaker.is_open())
+
+    def test_half_open_after_timeout(self, monotonic):
+        monotonic.return_value = 100
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        breaker.record_failure()
+        breaker.record_failure()
+        monotonic.return_value = 129
+        self.assertTrue(breaker.is_open())
+        monotonic.return_value = 130
+        self.assertFalse(breaker.is_open())
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open())
+
+
+class FailingBackend:
+    def __init__(self, error):
+        self.error = error
+        self.calls_count = 0
+
+    def geocode(self, address):
+        self.calls_count += 1
+        raise self.error
+
+
+class GeocoderClientTest(SimpleTestCase):
+    def test_network_errors_open_the_breaker(self):
+        backend = FailingBackend(requests.ConnectTimeout())
+        client = GeocoderClient(backend, CircuitBreaker(2, 30))
+        for _ in range(3):
+            with self.assertRaises(GeocoderUnavailable):
+                client.fetch_coordinates('Москва, Ленина 5')
+        self.assertEqual(backend.calls_count, 2)
+
+    def test_unknown_address_is_not_a_failure(self):
+        backend = FailingBackend(AddressNotFound('Нигде'))
+        client = GeocoderClient(backend, CircuitBreaker(2, 30))
+        for _ in range(3):
+            with self.assertRaises(AddressNotFound):
+                client.fetch_coordinates('Нигде')
+        self.assertEqual(backend.calls_count, 3)
+
+
+@override_settings(
+    GEOCODER_RETRY_BASE_DELAY=60,
+    GEOCODER_RETRY_MAX_DELAY=300,
+    GEOCODER_MAX_ATTEMPTS=3
+)
+class GeocodingRetryTest(TestCase):
+    def test_retry_delay_doubles_up_to_limit(self):
+        self.assertEqual(
+            [get_retry_delay(attempts).seconds for attempts in range(1, 6)],
+            [60, 120, 240, 300, 300]
+        )
+
+    def test_failed_place_is_retried_later(self):
+        GeocodeJob.objects.create(address='Нигде')
+        worker = GeocodeWorker(stdout=StringIO(), stderr=StringIO())
+        worker.process_batch(StubGeocoder(), 10)
+
+        place = Place.objects.get(address='Нигде')
+        self.assertEqual(place.status, 'FAIL')
+        self.assertIsNone(place.longitude)
+        self.assertEqual(place.attempts, 1)
+        self.assertAlmostEqual(
+            place.next_retry_at,
+            timezone.now() + timedelta(seconds=60),
+            delta=timedelta(seconds=5)
+        )
+
+    def test_gives_up_after_max_attempts(self):
+        place = Place.objects.create(address='Нигде', status='FAIL', attempts=2)
+        mark_geocoding_failed(place)
+        self.assertEqual(place.attempts, 3)
+        self.assertIsNone(place.next_retry_at)
+
+    def test_schedules_only_due_retries(self):
+        now = timezone.now()
+        Place.objects.create(
+            address='Москва, Ленина 5',
+            status='FAIL',
+            next_retry_at=now - timedelta(minutes=1)
+        )
+        Place.objects.create(
+            address='Москва, Ленина 7',
+            status='FAIL',
+            next_retry_at=now + timedelta(minutes=1)
+        )
+
+        self.assertEqual(schedule_geocoding_retries(), 1)
+
+        self.assertEqual(
+            list(GeocodeJob.objects.values_list('address', flat=True)),
+            ['Москва, Ленина 5']
+        )
+        self.assertIsNone(
+            Place.objects.get(address='Москва, Ленина 5').next_retry_at
+        )
+
+
+class NormalizeAddressTest(SimpleTestCase):
+    def test_skips_words_and_punctuation(self):
+        self.assertEqual(
+            normalize_address('г. Москва, ул. Ленина, д. 5'),
+            'москва ленина 5'
+        )
+
+    def test_expands_abbreviations(self):
+        self.assertEqual(
+            normalize_address('Москва, пр-т Мира, корп. 2, кв. 10'),
+            'москва проспект мира корпус 2 квартира 10'
+        )
+
+    def test_same_address_written_differently(self):
+        self.assertEqual(
+            normalize_address('  Ёлочная   УЛИЦА 3/1 '),
+            normalize_address('елочная ул 3/1')
+        )
+
+
+class GetPlacesTest(TestCase):
+    def setUp(self):
+        place_cache.clear()
+
+    def test_finds_place_written_differently(self):
+        place = Place.objects.create(
+            address='Москва, ул. Ленина, д. 5',
+            longitude=37.61,
+            latitude=55.75,
+            status='OK'
+        )
+        self.assertEqual(
+            get_places(['г. Москва, Ленина 5']),
+            {'г. Москва, Ленина 5': place}
+        )
+
+    def test_prefers_geocoded_duplicate(self):
+        Place.objects.create(address='Москва, Ленина 5', status='FAIL')
+        place = Place.objects.create(
+            address='Москва, ул. Ленина, 5',
+            longitude=37.61,
+            latitude=55.75,
+            status='OK'
+        )
+        Place.objects.create(address='Москва, Ленина, д. 5', status='PEND')
+        self.assertEqual(
+            get_places(['Москва, Ленина 5']),
+            {'Москва, Ленина 5': place}
+        )
+
+
+class RefreshPlacesTest(TestCase):
+    def setUp(self):
+        for source in ['ORDR', 'REST', 'IMPT']:
+            Place.objects.create(
+                address=f'Москва, {source}',
+                longitude=37.61,
+                latitude=55.75,
+                status='OK',
+                source=source
+            )
+        Place.objects.create(
+            address='Москва, свежий',
+            longitude=37.61,
+            latitude=55.75,
+            status='OK'
+        )
+        Place.objects.exclude(address='Москва, свежий').update(
+            updated_at=timezone.now() - timedelta(days=60)
+        )
+        self.geocoder = StubGeocoder({
+            place.address: ('37.62', '55.76')
+            for place in Place.objects.all()
+        })
+
+    def refresh_places(self, *args):
+        with mock.patch(
+            'geodata.management.commands.refresh_places.get_geocoder',
+            return_value=self.geocoder
+        ):
+            call_command(
+                'refresh_places',
+                '--older-than=30',
+                '--rate=1000',
+                *args,
+                stdout=StringIO()
+            )
+
+    def test_skips_imported_places_by_default(self):
+        self.refresh_places()
+        self.assertEqual(
+            sorted(self.geocoder.addresses),
+            ['Москва, ORDR', 'Москва, REST']
+        )
+        place = Place.objects.get(address='Москва, ORDR')
+        self.assertEqual(float(place.latitude), 55.76)
+
+    def test_refreshes_chosen_sources(self):
+        self.refresh_places('--source=IMPT')
+        self.assertEqual(self.geocoder.addresses, ['Москва, IMPT'])
+
+
+class DeliveryZoneTest(SimpleTestCase):
+    zone = [[55.70, 37.50], [55.80, 37.50], [55.80, 37.70], [55.70, 37.60]]
+
+    def test_bounding_box(self):
+        self.assertEqual(
+            get_bounding_box(self.zone),
+            (55.70, 55.80, 37.50, 37.70)
+        )
+
+    def test_points_in_polygon(self):
+        self.assertEqual(
+            points_in_polygon(
+                [(55.75, 37.55), (55.72, 37.68), (55.90, 37.55)],
+                self.zone
+            ).tolist(),
+            [True, False, False]
+        )
+
+
+class GeohashTest(SimpleTestCase):
+    def test_encode(self):
+        self.assertEqual(geohash.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+
+    def test_decode_returns_cell_centre(self):
+        latitude, longitude = geohash.decode('u4pruydqqvj')
+        self.assertAlmostEqual(latitude, 57.64911, places=4)
+        self.assertAlmostEqual(longitude, 10.40744, places=4)
+
+    def test_neighbourhood(self):
+        cells = geohash.get_neighbourhood('u4pru')
+        self.assertEqual(len(cells), 9)
+        self.assertIn('u4pru', cells)
+        self.assertTrue(all(len(cell) == 5 for cell in cells))
+
+    def test_cell_is_not_smaller_than_radius(self):
+        precision = geohash.get_precision_for_radius(1000, 55.75)
+        lat_size, lon_size = geohash.get_cell_size(precision)
+        self.assertGreaterEqual(lat_size * geohash.METERS_PER_DEGREE, 1000)
+        lat_size, lon_size = geohash.get_cell_size(precision + 1)
+        self.assertLess(lat_size * geohash.METERS_PER_DEGREE, 1000)
+
+
+class NearbyPlacesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        coordinates = {
+            'Рядом': (55.7510, 37.6180),
+            'Через улицу': (55.7530, 37.6200),
+            'Другой город': (59.9390, 30.3150),
+        }
+        for address, (latitude, longitude) in coordinates.items():
+            Place.objects.create(
+                address=address,
+                latitude=latitude,
+                longitude=longitude,
+                status='OK'
+            )
+
+    def test_nearby(self):
+        self.assertEqual(
+            set(
+                Place.objects
+                .nearby(55.7500, 37.6170, 1000)
+                .values_list('address', flat=True)
+            ),
+            {'Рядом', 'Через улицу'}
+        )
+
+    def test_around_several_points(self):
+        self.assertEqual(
+            Place.objects.around(
+                [(55.7500, 37.6170), (59.9380, 30.3140)],
+                1000
+            ).count(),
+            3
+        )
+        self.assertFalse(Place.objects.around([], 1000).exists())
+
+
+class PlaceDistanceTest(TestCase):
+    def setUp(self):
+        self.order_place = Place.objects.create(
+            address='Москва, Ленина 5',
+            latitude=55.7500,
+            longitude=37.6170,
+            status='OK'
+        )
+        self.restaurant_place = Place.objects.create(
+            address='Москва, Тверская 1',
+            latitude=55.7570,
+            longitude=37.6150,
+            status='OK'
+        )
+
+    def get_distance(self):
+        return get_place_distances(
+            [(self.order_place, self.restaurant_place)]
+        )[(self.order_place.id, self.restaurant_place.id)]
+
+    def test_cached_distance_costs_one_query(self):
+        distance = self.get_distance()
+        self.assertAlmostEqual(distance, 790, delta=10)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_distance(), distance)
+
+    def test_save_with_new_coordinates_drops_distances(self):
+        self.get_distance()
+        self.restaurant_place.address = 'Москва, Тверская, 1'
+        self.restaurant_place.save()
+        self.assertTrue(PlaceDistance.objects.exists())
+
+        mark_geocoded(self.restaurant_place, 37.6170, 55.7600)
+        self.assertFalse(PlaceDistance.objects.exists())
+        self.assertAlmostEqual(self.get_distance(), 1112, delta=10)
+
+    def test_update_with_new_coordinates_drops_distances(self):
+        self.get_distance()
+        Place.objects.filter(pk=self.order_place.pk).update(status='OK')
+        self.assertTrue(PlaceDistance.objects.exists())
+
+        Place.objects.filter(pk=self.order_place.pk).update(latitude=55.7)
+        self.assertFalse(PlaceDistance.objects.exists())
+
+
+class NormalizePrefixTest(SimpleTestCase):
+    def test_complete_words(self):
+        self.assertEqual(
+            normalize_prefix('Москва, пр-т Мира '),
+            'москва проспект мира'
+        )
+
+    def test_unfinished_word_is_not_expanded(self):
+        self.assertEqual(normalize_prefix('Москва, пр'), 'москва пр')
+
+    def test_unfinished_skipped_word_is_dropped(self):
+        self.assertEqual(normalize_prefix('Москва, ул'), 'москва')
+        self.assertEqual(normalize_prefix('г'), '')
+
+
+class AddressIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for address, source, status in [
+            ('Москва, Пресненская наб., 8', 'IMPT', 'OK'),
+            ('Москва, проспект Мира, 10', 'REST', 'OK'),
+            ('Москва, ул. Улофа Пальме, 1', 'IMPT', 'OK'),
+            ('Москва, Пресненский вал, 3', 'ORDR', 'OK'),
+            ('Москва, Профсоюзная, 5', 'IMPT', 'FAIL'),
+        ]:
+            Place.objects.create(address=address, source=source, status=status)
+
+    def setUp(self):
+        self.index = AddressIndex(
+            refresh_interval=60,
+            rebuild_interval=3600,
+            refresh_overlap=600
+        )
+
+    def test_suggests_by_prefix(self):
+        self.assertEqual(
+            self.index.suggest('москва, пр', 10),
+            ['Москва, Пресненская наб., 8', 'Москва, проспект Мира, 10']
+        )
+
+    def test_skipped_word_at_the_end(self):
+        self.assertEqual(
+            self.index.suggest('Москва, ул', 10),
+            [
+                'Москва, Пресненская наб., 8',
+                'Москва, проспект Мира, 10',
+                'Москва, ул. Улофа Пальме, 1',
+            ]
+        )
+        self.assertEqual(
+            self.index.suggest('Москва, ул. Улоф', 10),
+            ['Москва, ул. Улофа Пальме, 1']
+        )
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.suggest('Москва', 2)), 2)
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from .views import address_suggest_api
+
+
+app_name = "geodata"
+
+urlpatterns = [
+    path('suggest/', address_suggest_api),
+]
@@ -1,3 +1,16 @@
-from django.shortcuts import render
+from django.http import JsonResponse
 
-# Create your views here.
+from .suggest import address_index
+
+
+ADDRESS_SUGGESTIONS_LIMIT = 10
+
+
+def address_suggest_api(request):
+    suggestions = address_index.suggest(
+        request.GET.get('q', ''),
+        ADDRESS_SUGGESTIONS_LIMIT
+    )
+    return JsonResponse(suggestions, safe=False, json_dumps_params={
+        'ensure_ascii': False,
+    })
@@ -0,0 +1,29 @@
+import numpy as np
+
+
+def get_bounding_box(polygon):
+    latitudes = [latitude for latitude, _ in polygon]
+    longitudes = [longitude for _, longitude in polygon]
+    return min(latitudes), max(latitudes), min(longitudes), max(longitudes)
+
+
+def points_in_polygon(points, polygon):
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    polygon = np.asarray(polygon, dtype=float).reshape(-1, 2)
+    point_lat = points[:, 0, np.newaxis]
+    point_lon = points[:, 1, np.newaxis]
+    start_lat = polygon[np.newaxis, :, 0]
+    start_lon = polygon[np.newaxis, :, 1]
+    end_lat = np.roll(polygon[:, 0], -1)[np.newaxis, :]
+    end_lon = np.roll(polygon[:, 1], -1)[np.newaxis, :]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crossing_lon = (
+            start_lon
+            + (point_lat - start_lat) * (end_lon - start_lon) / (end_lat - start_lat)
+        )
+    crosses = (
+        ((start_lat > point_lat) != (end_lat > point_lat))
+        & (point_lon < crossing_lon)
+    )
+    return crosses.sum(axis=1) % 2 == 1
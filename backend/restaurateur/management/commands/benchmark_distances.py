@@ -0,0 +1,56 @@
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from geopy import distance as dist
+
+from geodata.distances import haversine_matrix
+
+
+MOSCOW_BOUNDS = ((55.55, 55.95), (37.35, 37.85))
+
+
+def generate_coordinates(count):
+    (min_lat, max_lat), (min_lon, max_lon) = MOSCOW_BOUNDS
+    return [
+        (random.uniform(min_lat, max_lat), random.uniform(min_lon, max_lon))
+        for _ in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает попарный расчёт расстояний через geopy с матрицей NumPy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1000)
+        parser.add_argument('--restaurants', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        orders = generate_coordinates(options['orders'])
+        restaurants = generate_coordinates(options['restaurants'])
+
+        started_at = time.perf_counter()
+        geopy_distances = np.array([
+            [
+                dist.distance(restaurant, order).meters
+                for restaurant in restaurants
+            ]
+            for order in orders
+        ])
+        geopy_time = time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        numpy_distances = haversine_matrix(orders, restaurants)
+        numpy_time = time.perf_counter() - started_at
+
+        relative_error = np.abs(numpy_distances - geopy_distances) / geopy_distances
+        self.stdout.write(
+            f'{options["orders"]} заказов × {options["restaurants"]} ресторанов\n'
+            f'geopy: {geopy_time:.3f} с\n'
+            f'numpy: {numpy_time:.4f} с\n'
+            f'ускорение: {geopy_time / numpy_time:.0f}×\n'
+            f'макс. расхождение: {relative_error.max():.3%}'
+        )
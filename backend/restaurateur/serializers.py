@@ -0,0 +1,47 @@
+from rest_framework import serializers
+
+from foodcartapp.models import Order
+
+
+class ManagerOrderSerializer(serializers.ModelSerializer):
+    cooking_now = serializers.CharField(
+        source='cooking_now.name',
+        read_only=True,
+        allow_null=True
+    )
+    restaurants = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Order
+        fields = (
+            'id',
+            'status',
+            'payment_method',
+            'total_cost',
+            'firstname',
+            'lastname',
+            'phonenumber',
+            'address',
+            'comment',
+            'cooking_now',
+            'restaurants',
+            'created_at',
+            'updated_at',
+        )
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    def get_restaurants(self, order):
+        return [
+            {
+                'id': restaurant.id,
+                'name': restaurant.name,
+                'distance': distance,
+                'cooking_orders_count': restaurant.get_cooking_orders_count(),
+            }
+            for restaurant, distance in order.ranked_restaurants
+        ]
@@ -1,3 +1,341 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from foodcartapp.models import (
+    Order,
+    OrderItem,
+    Product,
+    Restaurant,
+    RestaurantMenuItem,
+)
+from geodata.models import Place
+from geodata.places import place_cache
+
+from .serializers import ManagerOrderSerializer
+from .views import (
+    format_orders_cursor,
+    format_stream_cursor,
+    get_changed_orders,
+    parse_orders_cursor,
+)
+
+
+def create_order(**fields):
+    return Order.objects.create(
+        firstname='Иван',
+        lastname='Петров',
+        phonenumber='+79991234567',
+        address='Москва, Ленина 5',
+        **fields
+    )
+
+
+class OrdersCursorTest(SimpleTestCase):
+    def test_parse_cursor(self):
+        created_at = timezone.now()
+        self.assertEqual(
+            parse_orders_cursor(f'{created_at.isoformat()},42'),
+            (created_at, 42)
+        )
+
+    def test_parse_invalid_cursor(self):
+        invalid_values = [
+            '',
+            '42',
+            'вчера,42',
+            '2024-01-01T10:00:00,',
+            '2024-13-01T10:00:00,1',
+        ]
+        for value in invalid_values:
+            with self.subTest(value=value):
+                self.assertIsNone(parse_orders_cursor(value))
+
+
+@mock.patch('restaurateur.views.ORDERS_PAGE_SIZE', 2)
+class OrdersBoardTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', is_staff=True)
+
+    def setUp(self):
+        self.client.force_login(self.manager)
+
+    def get_orders_page(self, **params):
+        return self.client.get(reverse('restaurateur:view_orders'), params)
+
+    def test_pages_through_open_orders(self):
+        first_order = create_order()
+        create_order(status='PROC')
+        second_order = create_order(status='COOK')
+        third_order = create_order()
+
+        response = self.get_orders_page()
+        self.assertEqual(
+            [order.id for order in response.context['order_items']],
+            [first_order.id, second_order.id]
+        )
+        self.assertEqual(
+            response.context['next_cursor'],
+            format_orders_cursor(second_order)
+        )
+
+        response = self.get_orders_page(after=response.context['next_cursor'])
+        self.assertEqual(
+            [order.id for order in response.context['order_items']],
+            [third_order.id]
+        )
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_orders_created_at_the_same_moment(self):
+        created_at = timezone.now()
+        orders = [create_order() for _ in range(3)]
+        Order.objects.update(created_at=created_at)
+
+        response = self.get_orders_page()
+        response = self.get_orders_page(after=response.context['next_cursor'])
+        self.assertEqual(
+            [order.id for order in response.context['order_items']],
+            [orders[2].id]
+        )
+
+    def test_ranks_nearest_restaurants(self):
+        place_cache.clear()
+        burger = Product.objects.create(name='Бургер', price=100)
+        coordinates = {
+            'Москва, Тверская 1': (55.7570, 37.6150),
+            'Москва, Ленина 5': (55.7500, 37.6170),
+            'Санкт-Петербург, Невский 1': (59.9390, 30.3150),
+        }
+        places = {
+            address: Place.objects.create(
+                address=address,
+                latitude=latitude,
+                longitude=longitude,
+                status='OK'
+            )
+            for address, (latitude, longitude) in coordinates.items()
+        }
+        for address in ['Москва, Тверская 1', 'Санкт-Петербург, Невский 1']:
+            RestaurantMenuItem.objects.create(
+                restaurant=Restaurant.objects.create(
+                    name=address,
+                    address=address
+                ),
+                product=burger
+            )
+        located_order = create_order(place=places['Москва, Ленина 5'])
+        order = create_order()
+        for order in [located_order, order]:
+            OrderItem.objects.create(
+                order=order,
+                product=burger,
+                quantity=1,
+                price=burger.price
+            )
+        Order.objects.refresh_candidate_restaurants()
+
+        response = self.get_orders_page()
+        restaurants = {
+            order.id: [name for name, *_ in order.restaurants]
+            for order in response.context['order_items']
+        }
+        self.assertEqual(
+            restaurants[located_order.id],
+            ['Москва, Тверская 1']
+        )
+        self.assertEqual(
+            sorted(restaurants[order.id]),
+            ['Москва, Тверская 1', 'Санкт-Петербург, Невский 1']
+        )
+
+
+class OrdersStreamTest(TestCase):
+    def get_changed_order_ids(self, cursor, until):
+        orders, next_cursor = get_changed_orders(cursor, until)
+        return [order.id for order in orders], next_cursor
+
+    def test_rereads_overlap_window(self):
+        now = timezone.now()
+        old_order = create_order()
+        late_order = create_order()
+        new_order = create_order()
+        Order.objects.filter(pk=old_order.pk).update(
+            updated_at=now - timedelta(minutes=5)
+        )
+        # закоммичен после прошлого опроса, но с более ранним updated_at
+        Order.objects.filter(pk=late_order.pk).update(
+            updated_at=now - timedelta(seconds=10)
+        )
+        Order.objects.filter(pk=new_order.pk).update(updated_at=now)
+
+        self.assertEqual(
+            self.get_changed_order_ids((now, 0), now + timedelta(seconds=1)),
+            ([late_order.id, new_order.id], (now + timedelta(seconds=1), 0))
+        )
+
+    @mock.patch('restaurateur.views.ORDERS_STREAM_BATCH_SIZE', 2)
+    def test_continues_after_full_batch(self):
+        started_at = timezone.now()
+        for _ in range(3):
+            create_order()
+        orders = list(Order.objects.order_by('updated_at', 'id'))
+        until = timezone.now()
+
+        order_ids, next_cursor = self.get_changed_order_ids(
+            (started_at, 0),
+            until
+        )
+        self.assertEqual(order_ids, [orders[0].id, orders[1].id])
+        self.assertEqual(next_cursor, (orders[1].updated_at, orders[1].id))
+
+        order_ids, next_cursor = self.get_changed_order_ids(next_cursor, until)
+        self.assertEqual(order_ids, [orders[2].id])
+        self.assertEqual(next_cursor, (until, 0))
+
+    def test_sends_order_when_its_place_is_geocoded(self):
+        place = Place.objects.create(address='Москва, Ленина 5')
+        order = create_order(place=place)
+        Order.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        cursor = (timezone.now(), 0)
+
+        place.latitude = 55.75
+        place.longitude = 37.61
+        place.status = 'OK'
+        place.save()
+
+        orders, _ = get_changed_orders(cursor, timezone.now())
+        self.assertEqual([order.id for order in orders], [order.id])
+
+    def test_stream_events(self):
+        manager = User.objects.create_user('manager', is_staff=True)
+        self.client.force_login(manager)
+        cursor = (timezone.now() - timedelta(hours=1), 0)
+        order = create_order()
+        processed_order = create_order(status='PROC')
+
+        response = self.client.get(
+            reverse('restaurateur:stream_orders'),
+            HTTP_LAST_EVENT_ID=format_stream_cursor(cursor)
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = b''.join(response.streaming_content).decode()
+        self.assertIn(f'event: order\ndata: {{"id": {order.id}', events)
+        self.assertIn(
+            'event: remove\ndata: ' + json.dumps({'id': processed_order.id}),
+            events
+        )
+
+        response = self.client.get(reverse('restaurateur:stream_orders'))
+        self.assertEqual(response.status_code, 400)
+
+
+class ManagerOrdersAPIQueriesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        place_cache.clear()
+        cls.manager = User.objects.create_user('manager', is_staff=True)
+        cls.burger = Product.objects.create(name='Бургер', price=100)
+        Place.objects.create(
+            address='Москва, Тверская 1',
+            latitude=55.7570,
+            longitude=37.6150,
+            status='OK'
+        )
+        RestaurantMenuItem.objects.create(
+            restaurant=Restaurant.objects.create(
+                name='Ресторан',
+                address='Москва, Тверская 1'
+            ),
+            product=cls.burger
+        )
+        cls.place = Place.objects.create(
+            address='Москва, Ленина 5',
+            latitude=55.7500,
+            longitude=37.6170,
+            status='OK'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.manager)
+
+    def create_orders(self, count):
+        for _ in range(count):
+            order = create_order(place=self.place)
+            OrderItem.objects.create(
+                order=order,
+                product=self.burger,
+                quantity=1,
+                price=self.burger.price
+            )
+        Order.objects.refresh_candidate_restaurants()
+
+    def get_orders(self, fields):
+        return self.client.get(
+            reverse('restaurateur:orders_api'),
+            {'fields': fields}
+        )
+
+    def test_projections_do_not_query_per_order(self):
+        for fields, queries_count in [
+            ('id,address', 3),
+            ('id,cooking_now', 3),
+            ('id,restaurants', 7),
+        ]:
+            with self.subTest(fields=fields):
+                Order.objects.all().delete()
+                self.create_orders(1)
+                self.get_orders(fields)
+                with self.assertNumQueries(queries_count):
+                    self.get_orders(fields)
+                self.create_orders(5)
+                with self.assertNumQueries(queries_count):
+                    response = self.get_orders(fields)
+                self.assertEqual(len(response.json()['results']), 6)
+
+
+class ManagerOrdersAPITest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', is_staff=True)
+        cls.order = create_order(comment='Позвонить за час')
+
+    def setUp(self):
+        self.client.force_login(self.manager)
+
+    def get_orders(self, **params):
+        return self.client.get(reverse('restaurateur:orders_api'), params)
+
+    def test_returns_all_fields_by_default(self):
+        order = self.get_orders().json()['results'][0]
+        self.assertEqual(set(order), set(ManagerOrderSerializer.Meta.fields))
+        self.assertEqual(order['restaurants'], [])
+
+    def test_projection(self):
+        response = self.get_orders(fields='id,comment')
+        self.assertEqual(
+            response.json(),
+            {
+                'results': [
+                    {'id': self.order.id, 'comment': 'Позвонить за час'},
+                ],
+                'next': None,
+            }
+        )
+
+    def test_unknown_fields(self):
+        response = self.get_orders(fields='id,password,customer')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            {'fields': ['Неизвестные поля: customer, password']}
+        )
+
+    def test_only_for_managers(self):
+        self.client.force_login(User.objects.create_user('customer'))
+        self.assertEqual(self.get_orders().status_code, 403)
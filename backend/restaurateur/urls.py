@@ -14,6 +14,9 @@ urlpatterns = [
 
     # TODO заглушка для нереализованного функционала
     path('orders/', views.view_orders, name="view_orders"),
+    path('orders/stream/', views.stream_orders, name="stream_orders"),
+    path('api/orders/', views.ManagerOrdersAPIView.as_view(), name="orders_api"),
+    path('orders/claim/', views.claim_next_order, name="claim_next_order"),
 
     path('login/', views.LoginView.as_view(), name="login"),
     path('logout/', views.LogoutView.as_view(), name="logout"),
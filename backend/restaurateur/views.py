@@ -1,17 +1,57 @@
-import requests
-from environs import Env
-from geopy import distance as dist
+import json
+import time
+from collections import defaultdict
+from datetime import timedelta
+from urllib.parse import urlencode
+
 from django import forms
+from django.conf import settings
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
 from django.views import View
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import user_passes_test
-from django.db.models import Prefetch
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.contrib.auth import authenticate, login
 from django.contrib.auth import views as auth_views
-
-from foodcartapp.models import Product, Restaurant, Order, RestaurantMenuItem
-from geodata.models import Place
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from foodcartapp.models import (
+    Product,
+    Restaurant,
+    Order,
+    OrderCandidateRestaurant,
+)
+
+from .serializers import ManagerOrderSerializer
+
+
+OPEN_ORDER_STATUSES = ['UNPR', 'COOK']
+ORDERS_PAGE_SIZE = 50
+ORDERS_STREAM_BATCH_SIZE = 100
+ORDERS_STREAM_OVERLAP = timedelta(seconds=settings.ORDERS_STREAM_OVERLAP)
+ORDER_FIELD_COLUMNS = {
+    'id': ['id'],
+    'status': ['status'],
+    'payment_method': ['payment_method'],
+    'total_cost': ['total_cost'],
+    'firstname': ['firstname'],
+    'lastname': ['lastname'],
+    'phonenumber': ['phonenumber'],
+    'address': ['address'],
+    'comment': ['comment'],
+    'cooking_now': ['cooking_now__name'],
+    'restaurants': ['cooking_now', 'place', 'updated_at'],
+    'created_at': ['created_at'],
+    'updated_at': ['updated_at'],
+}
 
 
 class Login(forms.Form):
@@ -68,58 +108,83 @@ def is_manager(user):
 
 def sort_distance(item):
     _, value = item
-    if isinstance(value, (int, float)):
-        return (0, value)
-    return (1, float('inf'))
+    if value is None:
+        return (1, float('inf'))
+    return (0, value)
 
 
 def format_distance(value):
-    if isinstance(value, (int, float)):
-        if value >= 1000:
-            return f"{value / 1000:.1f} км".replace('.0', '')
-        return f"{int(value)} м"
-    return str(value)
-
-
-def fetch_coordinates(apikey, address):
-    base_url = "https://geocode-maps.yandex.ru/1.x"
-    response = requests.get(base_url, params={
-        "geocode": address,
-        "apikey": apikey,
-        "format": "json",
-    })
-    response.raise_for_status()
-    found_places = response.json()['response']['GeoObjectCollection']['featureMember']
+    if value is None:
+        return 'Ошибка получения координат'
+    if value >= 1000:
+        return f"{value / 1000:.1f} км".replace('.0', '')
+    return f"{int(value)} м"
 
-    if not found_places:
-        return None
 
-    most_relevant = found_places[0]
-    lon, lat = most_relevant['GeoObject']['Point']['pos'].split(" ")
-    return (lon, lat)
+def format_orders_cursor(order):
+    return f'{order.created_at.isoformat()},{order.id}'
 
 
-def fetch_restaurant_coordinates(apikey, places, restaurant, order_coordinates):
+def format_stream_cursor(cursor):
+    updated_at, order_id = cursor
+    return f'{updated_at.isoformat()},{order_id}'
+
+
+def parse_orders_cursor(value):
+    created_at, _, order_id = value.rpartition(',')
     try:
-        if restaurant.address not in places:
-            longitude, latitude = fetch_coordinates(apikey, restaurant.address)
-            place = Place.objects.create(
-                address=restaurant.address,
-                longitude=longitude,
-                latitude=latitude
+        created_at = parse_datetime(created_at)
+        order_id = int(order_id)
+    except ValueError:
+        return None
+    if not created_at:
+        return None
+    return created_at, order_id
+
+
+def is_located(place):
+    return place is not None and place.status == 'OK'
+
+
+def rank_candidate_restaurants(orders):
+    unassigned_orders = [order for order in orders if not order.cooking_now_id]
+    located_order_ids = {
+        order.id for order in unassigned_orders if is_located(order.place)
+    }
+    ranked_restaurants = defaultdict(list)
+    # без координат заказа зоны доставки и расстояния проверить нельзя,
+    # такие заказы показываем со всеми кандидатами
+    for candidate in (
+        OrderCandidateRestaurant.objects
+        .filter(order__in=[order.id for order in unassigned_orders])
+        .exclude(order__in=located_order_ids)
+        .select_related('restaurant__load')
+    ):
+        ranked_restaurants[candidate.order_id].append(
+            (candidate.restaurant, None)
+        )
+    ranked_restaurants.update(
+        OrderCandidateRestaurant.objects
+        .filter(order__in=located_order_ids)
+        .nearest(
+            settings.RESTAURANT_SEARCH_RADIUS,
+            settings.RESTAURANT_SEARCH_LIMIT
+        )
+    )
+
+    for order in orders:
+        order.ranked_restaurants = sorted(
+            ranked_restaurants[order.id],
+            key=sort_distance
+        )
+        order.restaurants = [
+            (
+                restaurant.name,
+                format_distance(distance),
+                restaurant.get_cooking_orders_count(),
             )
-            places[restaurant.address] = place
-        else:
-            place = places[restaurant.address]
-        if order_coordinates == (0.0, 0.0):
-            return (restaurant.name, 'Ошибка получения координат')
-        distance = dist.distance(
-            (place.latitude, place.longitude),
-            order_coordinates
-        ).meters
-        return (restaurant.name, distance)
-    except Exception:
-        return (restaurant.name, 'Ошибка получения координат')
+            for restaurant, distance in order.ranked_restaurants
+        ]
 
 
 @user_passes_test(is_manager, login_url='restaurateur:login')
@@ -149,54 +214,204 @@ def view_restaurants(request):
     })
 
 
+@require_POST
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def claim_next_order(request):
+    order = Order.objects.claim_next(request.user, settings.ORDER_CLAIM_TIMEOUT)
+    if not order:
+        return redirect('restaurateur:view_orders')
+    order_url = reverse('admin:foodcartapp_order_change', args=[order.id])
+    orders_url = reverse('restaurateur:view_orders')
+    return redirect(f'{order_url}?{urlencode({"next": orders_url})}')
+
+
+def prepare_orders(orders):
+    for order in orders:
+        order.version_at = order.updated_at
+        if order.place and order.place.updated_at > order.updated_at:
+            order.version_at = order.place.updated_at
+    rank_candidate_restaurants(orders)
+
+
+def get_order_version(order):
+    return int(order.version_at.timestamp()) * 1000000 \
+        + order.version_at.microsecond
+
+
+def get_changed_orders(cursor, until):
+    updated_at, order_id = cursor
+    if order_id:
+        changes_filter = (
+            Q(updated_at__gt=updated_at)
+            | Q(updated_at=updated_at, id__gt=order_id)
+        )
+    else:
+        # транзакция могла закоммитить заказ позже, чем проставила updated_at,
+        # поэтому перечитываем окно перед курсором, а повторы отсеивает браузер
+        changes_filter = Q(updated_at__gte=updated_at - ORDERS_STREAM_OVERLAP)
+    orders = list(
+        Order.objects
+        .filter(changes_filter, updated_at__lt=until)
+        .order_by('updated_at', 'id')
+        .select_related(
+            'cooking_now',
+            'claimed_by',
+            'place'
+        )[:ORDERS_STREAM_BATCH_SIZE]
+    )
+    next_cursor = (until, 0)
+    if len(orders) == ORDERS_STREAM_BATCH_SIZE:
+        next_cursor = (orders[-1].updated_at, orders[-1].id)
+
+    # у заказа могли появиться координаты, хотя сам заказ не менялся
+    orders += list(
+        Order.objects
+        .filter(
+            status__in=OPEN_ORDER_STATUSES,
+            place__status='OK',
+            place__updated_at__gte=updated_at - ORDERS_STREAM_OVERLAP,
+            place__updated_at__lt=until
+        )
+        .exclude(id__in=[order.id for order in orders])
+        .select_related('cooking_now', 'claimed_by', 'place')
+    )
+    return orders, next_cursor
+
+
+def generate_order_events(cursor, timeout, poll_interval):
+    started_at = time.monotonic()
+    orders_url = reverse('restaurateur:view_orders')
+    yield f'retry: {int(poll_interval * 1000)}\n\n'
+    while True:
+        orders, cursor = get_changed_orders(cursor, timezone.now())
+        open_orders = [
+            order for order in orders if order.status in OPEN_ORDER_STATUSES
+        ]
+        prepare_orders(open_orders)
+        events = []
+        for order in orders:
+            if order.status in OPEN_ORDER_STATUSES:
+                data = {
+                    'id': order.id,
+                    'version': get_order_version(order),
+                    'html': render_to_string('order_row.html', {
+                        'item': order,
+                        'next_url': orders_url,
+                    }),
+                }
+                events.append(f'event: order\ndata: {json.dumps(data)}\n\n')
+            else:
+                data = {'id': order.id}
+                events.append(f'event: remove\ndata: {json.dumps(data)}\n\n')
+        events.append(f'id: {format_stream_cursor(cursor)}\n\n')
+        yield ''.join(events)
+        if time.monotonic() - started_at >= timeout:
+            break
+        time.sleep(poll_interval)
+
+
 @user_passes_test(is_manager, login_url='restaurateur:login')
 def view_orders(request):
-    env = Env()
-    env.read_env()
-    api_key = env.str('YANDEX_API_KEY')
+    stream_cursor = (timezone.now(), 0)
     orders = (
         Order.objects
-        .calculate_total_price()
-        .prefetch_related(Prefetch(
-            'products__menu_items',
-            queryset=(
-                RestaurantMenuItem.objects
-                .filter(availability=True)
-                .select_related('restaurant')
-            ),
-            to_attr='available_menu_items'
-        ))
+        .filter(status__in=OPEN_ORDER_STATUSES)
+        .order_by('created_at', 'id')
     )
-    order_addresses = {order.address for order in orders}
-    places = {
-        place.address: place
-        for place in Place.objects.filter(address__in=order_addresses)
-    }
-    for order in orders:
-        restaurants = None
-        place = places[order.address]
-        order_coordinates = (place.latitude, place.longitude)
-        for product in order.products.all():
-            available_menu_items = getattr(product, 'available_menu_items', [])
-            if restaurants is None:
-                restaurants = {
-                    item.restaurant for item in available_menu_items}
-            else:
-                restaurants.intersection_update(
-                    item.restaurant for item in available_menu_items)
-        restaurants = sorted(
-            [fetch_restaurant_coordinates(
-                api_key,
-                places,
-                restaurant,
-                order_coordinates
-            ) for restaurant in restaurants],
-            key=sort_distance
+    cursor = parse_orders_cursor(request.GET.get('after', ''))
+    if cursor:
+        created_at, order_id = cursor
+        orders = orders.filter(
+            Q(created_at__gt=created_at)
+            | Q(created_at=created_at, id__gt=order_id)
         )
-        order.restaurants = [
-            (name, format_distance(distance)) for name, distance in restaurants
-        ]
+    orders = list(
+        orders.select_related(
+            'cooking_now',
+            'claimed_by',
+            'place'
+        )[:ORDERS_PAGE_SIZE + 1]
+    )
+    next_cursor = None
+    if len(orders) > ORDERS_PAGE_SIZE:
+        orders = orders[:ORDERS_PAGE_SIZE]
+        next_cursor = format_orders_cursor(orders[-1])
+    prepare_orders(orders)
 
     return render(request, template_name='order_items.html', context={
-        'order_items': orders
+        'order_items': orders,
+        'next_cursor': next_cursor,
+        'is_first_page': cursor is None,
+        'next_url': request.get_full_path(),
+        'stream_cursor': format_stream_cursor(stream_cursor),
     })
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def stream_orders(request):
+    cursor = parse_orders_cursor(
+        request.headers.get('Last-Event-ID')
+        or request.GET.get('after', '')
+    )
+    if not cursor:
+        return HttpResponseBadRequest('Не указан курсор')
+    response = StreamingHttpResponse(
+        generate_order_events(
+            cursor,
+            settings.ORDERS_STREAM_TIMEOUT,
+            settings.ORDERS_STREAM_POLL_INTERVAL
+        ),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class ManagerOrdersAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        fields = list(ManagerOrderSerializer.Meta.fields)
+        if request.query_params.get('fields'):
+            fields = request.query_params['fields'].split(',')
+            unknown_fields = set(fields) - set(ORDER_FIELD_COLUMNS)
+            if unknown_fields:
+                unknown_fields = ', '.join(sorted(unknown_fields))
+                raise ValidationError({
+                    'fields': [f'Неизвестные поля: {unknown_fields}']
+                })
+
+        columns = {'id', 'created_at'}
+        for field in fields:
+            columns.update(ORDER_FIELD_COLUMNS[field])
+        orders = (
+            Order.objects
+            .filter(status__in=OPEN_ORDER_STATUSES)
+            .order_by('created_at', 'id')
+            .only(*columns)
+        )
+        cursor = parse_orders_cursor(request.query_params.get('after', ''))
+        if cursor:
+            created_at, order_id = cursor
+            orders = orders.filter(
+                Q(created_at__gt=created_at)
+                | Q(created_at=created_at, id__gt=order_id)
+            )
+        if 'cooking_now' in fields:
+            orders = orders.select_related('cooking_now')
+        if 'restaurants' in fields:
+            orders = orders.select_related('place')
+        orders = list(orders[:ORDERS_PAGE_SIZE + 1])
+        next_cursor = None
+        if len(orders) > ORDERS_PAGE_SIZE:
+            orders = orders[:ORDERS_PAGE_SIZE]
+            next_cursor = format_orders_cursor(orders[-1])
+        if 'restaurants' in fields:
+            prepare_orders(orders)
+
+        serializer = ManagerOrderSerializer(orders, many=True, fields=fields)
+        return Response({
+            'results': serializer.data,
+            'next': next_cursor,
+        })
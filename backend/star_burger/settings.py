@@ -95,6 +95,12 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': env.dj_cache_url('CACHE_URL', default='locmem://'),
+}
+
+PRODUCT_CATALOG_CACHE_TIMEOUT = env.int('PRODUCT_CATALOG_CACHE_TIMEOUT', 300)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -132,6 +138,38 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, '..', 'frontend', "bundles"),
 ]
 
+PLACE_CACHE_SIZE = env.int('PLACE_CACHE_SIZE', 10000)
+PLACE_CACHE_TTL = env.int('PLACE_CACHE_TTL', 600)
+
+ADDRESS_INDEX_REFRESH_INTERVAL = env.int('ADDRESS_INDEX_REFRESH_INTERVAL', 60)
+ADDRESS_INDEX_REFRESH_OVERLAP = env.int('ADDRESS_INDEX_REFRESH_OVERLAP', 10 * 60)
+ADDRESS_INDEX_REBUILD_INTERVAL = env.int('ADDRESS_INDEX_REBUILD_INTERVAL', 60 * 60)
+
+RESTAURANT_SEARCH_RADIUS = env.int('RESTAURANT_SEARCH_RADIUS', 15000)
+RESTAURANT_SEARCH_LIMIT = env.int('RESTAURANT_SEARCH_LIMIT', 10)
+
+ORDER_ASSIGNMENT_CAPACITY = env.int('ORDER_ASSIGNMENT_CAPACITY', 10)
+ORDER_CLAIM_TIMEOUT = env.int('ORDER_CLAIM_TIMEOUT', 15 * 60)
+ORDERS_STREAM_TIMEOUT = env.int('ORDERS_STREAM_TIMEOUT', 0)
+ORDERS_STREAM_POLL_INTERVAL = env.float('ORDERS_STREAM_POLL_INTERVAL', 3)
+ORDERS_STREAM_OVERLAP = env.int('ORDERS_STREAM_OVERLAP', 60)
+
+YANDEX_API_KEY = env.str('YANDEX_API_KEY', '')
+GEOCODER_BACKEND = env.str(
+    'GEOCODER_BACKEND',
+    'geodata.geocoder.YandexGeocoder'
+)
+GEOCODER_FIXTURE_PATH = env.str('GEOCODER_FIXTURE_PATH', '')
+GEOCODER_CONNECT_TIMEOUT = env.float('GEOCODER_CONNECT_TIMEOUT', 3)
+GEOCODER_READ_TIMEOUT = env.float('GEOCODER_READ_TIMEOUT', 5)
+GEOCODER_POOL_SIZE = env.int('GEOCODER_POOL_SIZE', 4)
+GEOCODER_FAILURE_THRESHOLD = env.int('GEOCODER_FAILURE_THRESHOLD', 5)
+GEOCODER_RESET_TIMEOUT = env.float('GEOCODER_RESET_TIMEOUT', 30)
+GEOCODER_MAX_ATTEMPTS = env.int('GEOCODER_MAX_ATTEMPTS', 10)
+GEOCODER_RETRY_BASE_DELAY = env.int('GEOCODER_RETRY_BASE_DELAY', 60)
+GEOCODER_RETRY_MAX_DELAY = env.int('GEOCODER_RETRY_MAX_DELAY', 24 * 60 * 60)
+GEOCODER_JOB_TIMEOUT = env.int('GEOCODER_JOB_TIMEOUT', 10 * 60)
+
 ROLLBAR = {
     'access_token': env.str('ROLLBAR_TOKEN', default=''),
     'environment': env.str('ROLLBAR_ENV', default='development'),
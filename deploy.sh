@@ -9,6 +9,7 @@ docker compose build
 docker compose run --rm frontend
 docker compose up -d database
 docker compose up -d backend
+docker compose up -d geocode_worker
 sudo systemctl reload nginx.service
 sudo systemctl restart star-burger.service
 source .env
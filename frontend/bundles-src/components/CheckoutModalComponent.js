@@ -8,6 +8,7 @@ class CheckoutModal extends Component{
     lastname: "",
     phonenumber: "",
     address: "",
+    addressSuggestions: [],
     waitTillCheckoutEnds: false,
   }
 
@@ -37,6 +38,23 @@ class CheckoutModal extends Component{
     this.setState({
       address : value
     });
+    this.suggestAddresses(value);
+  }
+
+  async suggestAddresses(query){
+    if (query.length < 3){
+      return;
+    }
+    try {
+      let response = await fetch('/api/addresses/suggest/?q=' + encodeURIComponent(query));
+      if (response.ok){
+        this.setState({
+          addressSuggestions : await response.json()
+        });
+      }
+    } catch(error){
+      // подсказки необязательны, адрес можно ввести вручную
+    }
   }
 
   async submit(event){
@@ -76,7 +94,10 @@ class CheckoutModal extends Component{
               <label htmlFor="phonenumber">Телефон:</label>
               <input onChange={this.savePhonenumber} required id="phonenumber" maxLength="20" type="tel" className="form-control" placeholder="+7 901 ..."/><br/>
               <label htmlFor="address">Адрес доставки:</label>
-              <input onChange={this.saveAddress} required id="address" type="text" maxLength="256" className="form-control" placeholder="Город, улица, дом"/><br/>
+              <input onChange={this.saveAddress} required id="address" type="text" maxLength="256" className="form-control" placeholder="Город, улица, дом" list="address-suggestions" autoComplete="off"/><br/>
+              <datalist id="address-suggestions">
+                {this.state.addressSuggestions.map(address => <option key={address} value={address}/>)}
+              </datalist>
             </div>
           </Modal.Body>
           <Modal.Footer>